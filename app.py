@@ -1,15 +1,22 @@
 import os
 from config.settings import (
     OPENAI_API_KEY, ANTHROPIC_API_KEY, REMOVE_BG_API_KEY, DEEPSEEK_API_KEY,
-    GRADIO_SERVER_NAME, GRADIO_SERVER_PORT
+    GRADIO_SERVER_NAME, GRADIO_SERVER_PORT,
+    QUEUE_MAX_SIZE, LIGHT_CONCURRENCY_LIMIT, METRICS_PORT, BULK_ANALYSIS_ROOT
 )
 from config.logging_config import setup_logging
-from src.image_processing import ImageProcessor
+from src.image_processing import ENHANCEMENT_TYPES, ImageProcessor
 from src.ai_image_generator import AIImageGenerator
 from src.background_removal import BackgroundRemover
 from src.image_analysis import ImageAnalysis
+from src.bulk_analysis import analyze_dataset, query_results
+from src.duplicate_detection import HASH_FUNCTIONS, copy_for_duplicate, find_duplicates, identical_clusters
 from src.custom_filters import apply_custom_filter
-from src.resize_crop import resize_crop_image
+from src.resize_crop import RESAMPLE_FILTERS, RESIZE_MODES, resize_crop_image
+from src.admission import JobTimeoutError, OperationGates, ServerBusyError
+from src.metrics import start_metrics_server
+from src.renditions import DEFAULT_WIDTHS, RENDITION_FORMATS, generate_renditions
+import functools
 import logging
 import io
 import zipfile
@@ -25,11 +32,11 @@ SUPPORTED_FORMATS = [
     "JPEG", "JPG", "PNG", "BMP", "TIFF", "TIF", "WEBP", "GIF", 
     "ICO", "EPS", "PDF", "PSD", "SVG", "HEIC", "AVIF", "JXL"
 ]
-ENHANCEMENT_OPTIONS = [
-    "AI Super Resolution", "Noise Reduction", "Color Enhancement", "Brightness/Contrast", "Sharpening", "HDR Effect", "Vintage Filter", "Black & White", "Sepia", "Vignette", "Blur Background"
-]
+ENHANCEMENT_OPTIONS = ENHANCEMENT_TYPES
 
 processor = ImageProcessor()
+# Gradio's queue bounds light operations; heavy ones are dispatched straight to their own bounded gate
+gates = OperationGates()
 ai_generator = AIImageGenerator(openai_key=OPENAI_API_KEY, anthropic_key=ANTHROPIC_API_KEY)
 bg_remover = BackgroundRemover()
 
@@ -130,6 +137,22 @@ ANDROID_ICON_SIZES = {
     "xxxhdpi": 192,
 }
 
+def admitted(operation, fn):
+    gate = gates.for_operation(operation)
+    gated = gate.wrap(fn)
+
+    @functools.wraps(fn)
+    def handler(*args):
+        try:
+            return gated(*args)
+        except (ServerBusyError, JobTimeoutError) as e:
+            raise gr.Error(f"⏳ {str(e)}")
+
+    if gates.is_heavy(operation):
+        # The gate enforces the limit and rejects overflow, so Gradio must not queue in front of it
+        return {"fn": handler, "concurrency_limit": None, "concurrency_id": gate.name}
+    return {"fn": handler, "concurrency_limit": gate.concurrency, "concurrency_id": gate.name}
+
 def make_android_icons_zip(image: Image.Image) -> str:
     import tempfile
     with tempfile.NamedTemporaryFile(suffix=".zip", delete=False) as tmp:
@@ -176,7 +199,7 @@ with gr.Blocks(css=custom_css, title="🎨 Advanced Image Processing Suite", the
                     conv_status = gr.Textbox(label="📊 Status", interactive=False)
             
             conv_btn.click(
-                fn=lambda img, fmt, qual: processor.convert_image(img, fmt, qual) if img else (None, "❌ Please upload an image"),
+                **admitted("convert", lambda img, fmt, qual: processor.convert_image(img, fmt, qual) if img else (None, "❌ Please upload an image")),
                 inputs=[conv_input, conv_format, conv_quality],
                 outputs=[conv_output, conv_status]
             )
@@ -279,7 +302,9 @@ with gr.Blocks(css=custom_css, title="🎨 Advanced Image Processing Suite", the
             
             with gr.Row():
                 with gr.Column():
-                    enhance_input = gr.Image(label="📎 Upload Image to Enhance", type="filepath")
+                    # Paths in, paths out: results are written in the upload's format with its metadata, and Gradio
+                    # serves a returned path as-is instead of re-encoding a returned PIL image to WebP
+                    enhance_input = gr.Image(label="📎 Upload Image to Enhance", type="filepath", image_mode=None)
                     enhance_type = gr.Dropdown(
                         choices=ENHANCEMENT_OPTIONS,
                         value="Color Enhancement",
@@ -296,7 +321,7 @@ with gr.Blocks(css=custom_css, title="🎨 Advanced Image Processing Suite", the
                     enhance_status = gr.Textbox(label="📊 Enhancement Status", interactive=False)
             
             enhance_btn.click(
-                fn=lambda img, enh_type, intensity: processor.enhance_image(img, enh_type, intensity) if img else (None, "❌ Please upload an image"),
+                **admitted("enhance", lambda img, enh_type, intensity: processor.enhance_image(img, enh_type, intensity) if img is not None else (None, "❌ Please upload an image")),
                 inputs=[enhance_input, enhance_type, enhance_intensity],
                 outputs=[enhance_output, enhance_status]
             )
@@ -318,7 +343,7 @@ with gr.Blocks(css=custom_css, title="🎨 Advanced Image Processing Suite", the
             
             with gr.Row():
                 with gr.Column():
-                    bg_input = gr.Image(label="📎 Upload Image", type="filepath")
+                    bg_input = gr.Image(label="📎 Upload Image", type="filepath", image_mode=None)
                     bg_service = gr.Dropdown(
                         choices=list(BG_REMOVAL_SERVICES.keys()),
                         value="Local rembg",
@@ -343,7 +368,7 @@ with gr.Blocks(css=custom_css, title="🎨 Advanced Image Processing Suite", the
             )
             # Background removal (fixed: pass Remove.bg key directly)
             def remove_bg(img, service, removebg):
-                if not img:
+                if img is None:
                     return None, "❌ Please upload an image"
                 service_key = BG_REMOVAL_SERVICES.get(service, "local")
                 if service_key == "local":
@@ -354,7 +379,7 @@ with gr.Blocks(css=custom_css, title="🎨 Advanced Image Processing Suite", the
                 else:
                     return None, f"❌ {service} not implemented"
             bg_btn.click(
-                fn=remove_bg,
+                **admitted("remove_background", remove_bg),
                 inputs=[bg_input, bg_service, removebg_key],
                 outputs=[bg_output, bg_status]
             )
@@ -371,6 +396,9 @@ with gr.Blocks(css=custom_css, title="🎨 Advanced Image Processing Suite", the
                         value="Format Conversion",
                         label="🔧 Batch Operation"
                     )
+                    batch_dedupe = gr.Checkbox(
+                        label="🧬 Process identical files (same pHash and same bytes) once and reuse the result", value=False
+                    )
                     batch_btn = gr.Button("🚀 Process Batch", variant="primary")
                 
                 with gr.Column():
@@ -378,28 +406,45 @@ with gr.Blocks(css=custom_css, title="🎨 Advanced Image Processing Suite", the
                     batch_status = gr.Textbox(label="📊 Batch Status", interactive=False, lines=5)
             
             # Batch processing (refactored)
-            def process_batch(files, operation):
+            def process_batch(files, operation, reuse_duplicates=False):
                 if not files:
                     return None, "❌ Please upload images for batch processing"
+                paths = [file.name for file in files]
+                if reuse_duplicates:
+                    # Only identical files: near-duplicates (crops, edits, greyscale copies) need their own output
+                    clusters = identical_clusters(paths)
+                else:
+                    clusters = [[i] for i in range(len(paths))]
+                representative = {member: cluster[0] for cluster in clusters for member in cluster}
+                outputs = {}
                 results = []
                 status_messages = []
-                for i, file in enumerate(files):
+                for i, path in enumerate(paths):
+                    source = representative[i]
+                    if source != i:
+                        if outputs.get(source) is None:
+                            status_messages.append(f"File {i+1}: ❌ Duplicate of file {source+1}, which failed")
+                            continue
+                        results.append(copy_for_duplicate(outputs[source], paths[source], path))
+                        status_messages.append(f"File {i+1}: ♻️ Duplicate of file {source+1}, result reused")
+                        continue
                     try:
                         if operation == "Format Conversion":
-                            result, msg = processor.convert_image(file.name, "PNG")
+                            result, msg = processor.convert_image(path, "PNG")
                         elif operation == "Enhancement":
-                            result, msg = processor.enhance_image(file.name, "Color Enhancement")
+                            result, msg = processor.enhance_image(path, "Color Enhancement")
                         elif operation == "Background Removal":
-                            result, msg = bg_remover.remove_local(file.name)
+                            result, msg = bg_remover.remove_local(path)
                         if result:
+                            outputs[i] = result
                             results.append(result)
                         status_messages.append(f"File {i+1}: {msg}")
                     except Exception as e:
                         status_messages.append(f"File {i+1}: ❌ Error - {str(e)}")
                 return results if results else None, "\n".join(status_messages)
             batch_btn.click(
-                fn=process_batch,
-                inputs=[batch_files, batch_operation],
+                **admitted("batch", process_batch),
+                inputs=[batch_files, batch_operation, batch_dedupe],
                 outputs=[batch_output, batch_status]
             )
         
@@ -421,15 +466,70 @@ with gr.Blocks(css=custom_css, title="🎨 Advanced Image Processing Suite", the
                     def analyze_image(img_path):
                         return ImageAnalysis.analyze_image(img_path)
                     analysis_btn.click(
-                        fn=analyze_image,
+                        **admitted("analysis", analyze_image),
                         inputs=analysis_input,
                         outputs=analysis_output
                     )
-                
+
+                with gr.Tab("🧬 Find Duplicates"):
+                    with gr.Row():
+                        with gr.Column():
+                            dup_files = gr.Files(label="📎 Upload Images", file_types=["image"])
+                            dup_method = gr.Dropdown(choices=list(HASH_FUNCTIONS.keys()), value="pHash", label="🧮 Hash Method")
+                            dup_threshold = gr.Slider(0, 16, 5, step=1, label="🎚️ Max Hamming Distance")
+                            dup_btn = gr.Button("🧬 Find Duplicates", variant="primary")
+
+                        with gr.Column():
+                            dup_output = gr.JSON(label="📊 Duplicate Clusters")
+
+                    dup_btn.click(
+                        **admitted("find_duplicates", lambda files, method, threshold: find_duplicates([f.name for f in files or []], method, threshold)),
+                        inputs=[dup_files, dup_method, dup_threshold],
+                        outputs=dup_output
+                    )
+
+                with gr.Tab("📚 Bulk Analysis"):
+                    with gr.Row():
+                        with gr.Column():
+                            bulk_source = gr.Textbox(label=f"📁 Directory or Manifest File (inside {BULK_ANALYSIS_ROOT})", placeholder="assets")
+                            bulk_results = gr.Textbox(label="💾 Results File (CSV)", value="analysis_results.csv")
+                            bulk_metadata_only = gr.Checkbox(label="⚡ Metadata only (headers, no decode)", value=True)
+                            bulk_workers = gr.Slider(1, 16, 4, step=1, label="🧵 Workers")
+                            bulk_btn = gr.Button("📚 Analyze Dataset", variant="primary")
+                            bulk_status = gr.Textbox(label="📊 Bulk Status", interactive=False)
+
+                        with gr.Column():
+                            query_min_size = gr.Number(label="📦 Min File Size (MB)", value=0)
+                            query_min_mp = gr.Number(label="📐 Min Megapixels", value=0)
+                            query_transparency = gr.Dropdown(choices=["Any", "Yes", "No"], value="Any", label="🔳 Transparency")
+                            query_format = gr.Textbox(label="🎯 Format", placeholder="PNG")
+                            query_btn = gr.Button("🔎 Query Results")
+                            query_output = gr.JSON(label="📊 Matching Images")
+
+                    bulk_btn.click(
+                        **admitted("bulk_analysis", lambda src, out, meta, workers: analyze_dataset(src, out, meta, workers)[1]),
+                        inputs=[bulk_source, bulk_results, bulk_metadata_only, bulk_workers],
+                        outputs=bulk_status
+                    )
+
+                    def query_bulk_results(results_path, min_size, min_mp, transparency, image_format):
+                        return query_results(
+                            results_path,
+                            min_file_size_mb=min_size or None,
+                            has_transparency={"Yes": True, "No": False}.get(transparency),
+                            image_format=image_format or None,
+                            min_megapixels=min_mp or None
+                        )
+                    query_btn.click(
+                        **admitted("query_results", query_bulk_results),
+                        inputs=[bulk_results, query_min_size, query_min_mp, query_transparency, query_format],
+                        outputs=query_output
+                    )
+
                 with gr.Tab("🎨 Custom Filters"):
                     with gr.Row():
                         with gr.Column():
-                            filter_input = gr.Image(label="📎 Upload Image", type="filepath")
+                            filter_input = gr.Image(label="📎 Upload Image", type="filepath", image_mode=None)
                             
                             # Custom filter controls
                             brightness = gr.Slider(-100, 100, 0, label="☀️ Brightness")
@@ -445,7 +545,7 @@ with gr.Blocks(css=custom_css, title="🎨 Advanced Image Processing Suite", the
                     
                     # Advanced Tools: Custom Filters (refactored)
                     apply_filter_btn.click(
-                        fn=apply_custom_filter,
+                        **admitted("custom_filter", apply_custom_filter),
                         inputs=[filter_input, brightness, contrast, saturation, hue_shift],
                         outputs=[filter_output, filter_status]
                     )
@@ -453,10 +553,10 @@ with gr.Blocks(css=custom_css, title="🎨 Advanced Image Processing Suite", the
                 with gr.Tab("📏 Resize & Crop"):
                     with gr.Row():
                         with gr.Column():
-                            resize_input = gr.Image(label="📎 Upload Image", type="filepath")
+                            resize_input = gr.Image(label="📎 Upload Image", type="filepath", image_mode=None)
                             
                             resize_mode = gr.Radio(
-                                choices=["Resize", "Crop", "Smart Crop", "Canvas Resize"],
+                                choices=RESIZE_MODES,
                                 value="Resize",
                                 label="🔧 Operation Mode"
                             )
@@ -465,8 +565,9 @@ with gr.Blocks(css=custom_css, title="🎨 Advanced Image Processing Suite", the
                             new_height = gr.Number(label="📐 Height", value=600)
                             
                             maintain_ratio = gr.Checkbox(label="🔒 Maintain Aspect Ratio", value=True)
+                            smart_crop_faces = gr.Checkbox(label="🙂 Smart Crop: prioritise faces", value=False)
                             resize_quality = gr.Dropdown(
-                                choices=["NEAREST", "LANCZOS", "BILINEAR", "BICUBIC"],
+                                choices=RESAMPLE_FILTERS,
                                 value="LANCZOS",
                                 label="🎯 Resize Quality"
                             )
@@ -479,8 +580,8 @@ with gr.Blocks(css=custom_css, title="🎨 Advanced Image Processing Suite", the
                     
                     # Advanced Tools: Resize & Crop (refactored)
                     resize_btn.click(
-                        fn=resize_crop_image,
-                        inputs=[resize_input, resize_mode, new_width, new_height, maintain_ratio, resize_quality],
+                        **admitted("resize_crop", resize_crop_image),
+                        inputs=[resize_input, resize_mode, new_width, new_height, maintain_ratio, resize_quality, smart_crop_faces],
                         outputs=[resize_output, resize_status]
                     )
         
@@ -497,10 +598,40 @@ with gr.Blocks(css=custom_css, title="🎨 Advanced Image Processing Suite", the
                 return make_android_icons_zip(image)
 
             android_icon_btn.click(
-                fn=handle_android_icon,
+                **admitted("android_icons", handle_android_icon),
                 inputs=android_icon_input,
                 outputs=android_icon_zip
             )
+
+        # Tab 8: Renditions
+        with gr.Tab("🗂️ Renditions", elem_classes="feature-card"):
+            gr.Markdown("### Build responsive image renditions from a single decode and download as a ZIP")
+
+            with gr.Row():
+                with gr.Column():
+                    rendition_input = gr.Image(label="📎 Upload Image", type="filepath")
+                    rendition_widths = gr.Textbox(
+                        label="📐 Widths (px)",
+                        value=", ".join(str(w) for w in DEFAULT_WIDTHS)
+                    )
+                    rendition_formats = gr.CheckboxGroup(
+                        choices=list(RENDITION_FORMATS.keys()),
+                        value=["WEBP", "JPEG"],
+                        label="🎯 Formats"
+                    )
+                    rendition_quality = gr.Slider(minimum=10, maximum=100, value=85, step=5, label="🎛️ Quality")
+                    rendition_btn = gr.Button("🗂️ Generate Renditions", variant="primary")
+
+                with gr.Column():
+                    rendition_zip = gr.File(label="📥 Download Renditions ZIP")
+                    rendition_manifest = gr.JSON(label="🧾 srcset Manifest")
+                    rendition_status = gr.Textbox(label="📊 Status", interactive=False)
+
+            rendition_btn.click(
+                **admitted("renditions", generate_renditions),
+                inputs=[rendition_input, rendition_widths, rendition_formats, rendition_quality],
+                outputs=[rendition_zip, rendition_manifest, rendition_status]
+            )
     
     # Footer with additional information
     gr.HTML("""
@@ -529,9 +660,14 @@ with gr.Blocks(css=custom_css, title="🎨 Advanced Image Processing Suite", the
 
 # Launch configuration
 if __name__ == "__main__":
+    if METRICS_PORT:
+        start_metrics_server(METRICS_PORT)
+    demo.queue(default_concurrency_limit=LIGHT_CONCURRENCY_LIMIT, max_size=QUEUE_MAX_SIZE)
     demo.launch(
         server_name="localhost",
         server_port=7860,
+        # Every admitted job holds a Gradio worker thread while it runs or waits in its gate
+        max_threads=max(40, sum(gate.capacity for gate in gates.all()) + 8),
         share=True,
         favicon_path=None,
         pwa=True,
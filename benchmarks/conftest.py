@@ -0,0 +1,137 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import io
+import resource
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src import guardrails
+
+MEGAPIXELS = [float(mp) for mp in os.getenv("BENCH_MEGAPIXELS", "1,12,50").split(",") if mp.strip()]
+ROUNDS = int(os.getenv("BENCH_ROUNDS", 3))
+# Operations implemented as per-pixel Python loops are only measured up to this size
+SLOW_MAX_MEGAPIXELS = float(os.getenv("BENCH_SLOW_MAX_MP", 1))
+# "PIL" feeds an already-decoded image; encoded forms also time decode and re-encode, like real uploads
+SOURCE_FORMS = [form.strip().upper() for form in os.getenv("BENCH_SOURCE_FORMS", "PIL,PNG,JPEG").split(",")
+                if form.strip()]
+
+_images = {}
+_encoded = {}
+
+
+def synthetic_image(megapixels):
+    if megapixels not in _images:
+        width = int(round((megapixels * 1_000_000 * 4 / 3) ** 0.5))
+        height = int(round(megapixels * 1_000_000 / width))
+        rng = np.random.default_rng(42)
+        # Smooth gradients plus noise and hard edges, so codecs and filters do realistic work
+        x = np.linspace(0, 255, width, dtype=np.float32)
+        y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+        pixels = np.empty((height, width, 3), dtype=np.uint8)
+        pixels[:, :, 0] = (x + y) / 2
+        pixels[:, :, 1] = np.abs(x - y)
+        pixels[:, :, 2] = 255 - (x + y) / 2
+        pixels[height // 4:height // 2, width // 4:width // 2] = (220, 40, 40)
+        pixels = np.clip(pixels + rng.normal(0, 12, pixels.shape), 0, 255).astype(np.uint8)
+        _images[megapixels] = Image.fromarray(pixels, "RGB")
+    return _images[megapixels]
+
+
+def encoded_image(megapixels, image_format):
+    key = megapixels, image_format
+    if key not in _encoded:
+        buffer = io.BytesIO()
+        synthetic_image(megapixels).save(buffer, format=image_format, quality=90)
+        _encoded[key] = buffer.getvalue()
+    return _encoded[key]
+
+
+def _read_peak_rss_mb():
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss is KiB on Linux, bytes on macOS, and cannot be reset
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def _reset_peak_rss():
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+    except OSError:
+        pass
+
+
+@pytest.fixture(params=MEGAPIXELS, ids=lambda mp: f"{mp:g}MP")
+def megapixels(request):
+    return request.param
+
+
+@pytest.fixture(params=SOURCE_FORMS)
+def source(request, megapixels):
+    if request.param == "PIL":
+        return synthetic_image(megapixels)
+    return encoded_image(megapixels, request.param)
+
+
+@pytest.fixture
+def skip_if_slow(megapixels):
+    def check(reason):
+        if megapixels > SLOW_MAX_MEGAPIXELS:
+            pytest.skip(f"{reason} is a per-pixel Python loop; raise BENCH_SLOW_MAX_MP to include it")
+    return check
+
+
+def _checked(fn):
+    # The public APIs report failures in their return value rather than raising
+    def call():
+        result = fn()
+        if isinstance(result, dict):
+            assert "error" not in result, result["error"]
+        else:
+            assert result[0] is not None, result[1]
+        return result
+    return call
+
+
+@pytest.fixture(autouse=True)
+def plans(monkeypatch):
+    # Benchmarks must time the full-size image: lift the input limits, and keep every plan so a downscale
+    # that slipped through still fails the run instead of being timed as full size
+    created = []
+
+    class RecordedPlan(guardrails.Plan):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            created.append(self)
+
+    monkeypatch.setattr(guardrails, "Plan", RecordedPlan)
+    monkeypatch.setattr(guardrails, "MAX_INPUT_FILE_MB", float("inf"))
+    monkeypatch.setattr(guardrails, "MAX_IMAGE_PIXELS", float("inf"))
+    monkeypatch.setattr(guardrails, "OPERATION_MEMORY_BUDGET_MB", float("inf"))
+    monkeypatch.setattr(guardrails, "OPERATION_MEMORY_BUDGETS_MB", {})
+    monkeypatch.setattr(guardrails, "OPERATION_PIXEL_LIMITS", {})
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", None)
+    return created
+
+
+@pytest.fixture
+def measure(benchmark, megapixels, plans):
+    def run(fn):
+        _reset_peak_rss()
+        benchmark.pedantic(_checked(fn), rounds=ROUNDS, iterations=1, warmup_rounds=0)
+        assert plans, "operation did not go through preflight"
+        assert all(plan.note == "" for plan in plans), plans[-1].note
+        benchmark.extra_info["megapixels"] = megapixels
+        benchmark.extra_info["peak_rss_mb"] = round(_read_peak_rss_mb(), 1)
+        benchmark.extra_info["mp_per_s"] = round(megapixels / benchmark.stats.stats.mean, 2)
+    return run
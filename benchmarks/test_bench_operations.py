@@ -0,0 +1,48 @@
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from PIL import Image
+
+from src.custom_filters import apply_custom_filter
+from src.image_analysis import ImageAnalysis
+from src.image_io import normalize_format
+from src.image_processing import ENHANCEMENT_TYPES, ImageProcessor
+from src.resize_crop import RESIZE_MODES, resize_crop_image
+
+processor = ImageProcessor()
+# Image.SAVE is filled lazily; without this every plugin-provided encoder looks missing
+Image.init()
+
+CONVERT_FORMATS = ["JPEG", "PNG", "BMP", "TIFF", "WEBP", "GIF", "ICO", "PDF", "AVIF"]
+SLOW_ENHANCEMENTS = {"Vignette"}
+
+
+@pytest.mark.parametrize("enhancement_type", ENHANCEMENT_TYPES)
+def test_enhance_image(measure, source, skip_if_slow, enhancement_type):
+    if enhancement_type in SLOW_ENHANCEMENTS:
+        skip_if_slow(enhancement_type)
+    measure(lambda: processor.enhance_image(source, enhancement_type, 1.0))
+
+
+@pytest.mark.parametrize("output_format", CONVERT_FORMATS)
+def test_convert_image(measure, source, output_format):
+    if normalize_format(output_format) not in Image.SAVE:
+        pytest.skip(f"No {output_format} encoder in this Pillow build")
+    measure(lambda: processor.convert_image(source, output_format, 90))
+
+
+@pytest.mark.parametrize("mode", RESIZE_MODES)
+def test_resize_crop_image(measure, source, mode):
+    measure(lambda: resize_crop_image(source, mode, 1920, 1080, True, "LANCZOS"))
+
+
+@pytest.mark.parametrize("hue", [0, 30], ids=["no-hue", "hue-shift"])
+def test_apply_custom_filter(measure, source, skip_if_slow, hue):
+    if hue:
+        skip_if_slow("Hue shift")
+    measure(lambda: apply_custom_filter(source, 20, 10, 15, hue))
+
+
+def test_analyze_image(measure, source):
+    measure(lambda: ImageAnalysis.analyze_image(source))
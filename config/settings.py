@@ -11,3 +11,50 @@ DEEPSEEK_API_KEY = os.getenv('DEEPSEEK_API_KEY')
 GRADIO_SERVER_NAME = os.getenv('GRADIO_SERVER_NAME', '0.0.0.0')
 GRADIO_SERVER_PORT = int(os.getenv('GRADIO_SERVER_PORT', 7860))
 LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+
+# Execution model: light operations share one pool, heavy ones (denoise, rembg, batch) get a bounded queue
+QUEUE_MAX_SIZE = int(os.getenv('QUEUE_MAX_SIZE', 64))
+LIGHT_CONCURRENCY_LIMIT = int(os.getenv('LIGHT_CONCURRENCY_LIMIT', 8))
+HEAVY_CONCURRENCY_LIMIT = int(os.getenv('HEAVY_CONCURRENCY_LIMIT', 2))
+HEAVY_QUEUE_MAX_SIZE = int(os.getenv('HEAVY_QUEUE_MAX_SIZE', 8))
+LIGHT_REQUEST_TIMEOUT = float(os.getenv('LIGHT_REQUEST_TIMEOUT', 60))
+HEAVY_REQUEST_TIMEOUT = float(os.getenv('HEAVY_REQUEST_TIMEOUT', 600))
+HEAVY_OPERATIONS = [op.strip() for op in os.getenv(
+    'HEAVY_OPERATIONS', 'enhance,remove_background,batch,custom_filter,renditions,bulk_analysis,find_duplicates'
+).split(',') if op.strip()]
+LIGHT_QUEUE_MAX_SIZE = int(os.getenv('LIGHT_QUEUE_MAX_SIZE', 32))
+# Operations that get a pool of their own instead of sharing the light/heavy one, e.g. "remove_background=1,enhance=2"
+OPERATION_CONCURRENCY_LIMITS = {
+    op.strip(): int(limit) for op, _, limit in
+    (item.partition('=') for item in os.getenv('OPERATION_CONCURRENCY_LIMITS', '').split(',') if '=' in item)
+}
+
+# Headless HTTP API (python -m src.api_server)
+API_SERVER_HOST = os.getenv('API_SERVER_HOST', '0.0.0.0')
+API_SERVER_PORT = int(os.getenv('API_SERVER_PORT', 8000))
+API_MAX_UPLOAD_MB = int(os.getenv('API_MAX_UPLOAD_MB', 100))
+
+# Observability: Prometheus text endpoint for the Gradio app (0 disables) and optional OpenTelemetry spans
+METRICS_PORT = int(os.getenv('METRICS_PORT', 0))
+OTEL_TRACING_ENABLED = os.getenv('OTEL_TRACING_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+
+# Input guardrails, checked from image headers before any full decode.
+# MAX_IMAGE_PIXELS is a hard ceiling; per-operation budgets below it downscale or reject per OVERSIZE_POLICY
+MAX_IMAGE_PIXELS = int(os.getenv('MAX_IMAGE_PIXELS', 100_000_000))
+MAX_IMAGE_FRAMES = int(os.getenv('MAX_IMAGE_FRAMES', 64))
+MAX_INPUT_FILE_MB = int(os.getenv('MAX_INPUT_FILE_MB', 100))
+OPERATION_MEMORY_BUDGET_MB = int(os.getenv('OPERATION_MEMORY_BUDGET_MB', 2048))
+# What to do with inputs over budget: "downscale" to fit, or "reject"
+OVERSIZE_POLICY = os.getenv('OVERSIZE_POLICY', 'downscale').lower()
+# Per-operation overrides, e.g. "remove_background=1024,enhance=3072" (MB) and "enhance=50000000" (pixels)
+OPERATION_MEMORY_BUDGETS_MB = {
+    op.strip(): int(mb) for op, _, mb in
+    (item.partition('=') for item in os.getenv('OPERATION_MEMORY_BUDGETS_MB', '').split(',') if '=' in item)
+}
+OPERATION_PIXEL_LIMITS = {
+    op.strip(): int(px) for op, _, px in
+    (item.partition('=') for item in os.getenv('OPERATION_PIXEL_LIMITS', '').split(',') if '=' in item)
+}
+
+# Bulk analysis scans and writes server-side paths; both must resolve inside this directory
+BULK_ANALYSIS_ROOT = os.getenv('BULK_ANALYSIS_ROOT', 'data')
@@ -0,0 +1,26 @@
+#!/bin/bash
+# Run the performance benchmarks on synthetic 1/12/50 MP images.
+#   ./scripts/run_benchmarks.sh record   save a new baseline to benchmarks/baselines/
+#   ./scripts/run_benchmarks.sh check    compare against the latest baseline (default), fail on regressions
+# BENCH_THRESHOLD (percent, default 15), BENCH_MEGAPIXELS, BENCH_ROUNDS and BENCH_SLOW_MAX_MP tune the run.
+
+set -e
+cd "$(dirname "$0")/.."
+
+STORAGE="file://./benchmarks/baselines"
+THRESHOLD="${BENCH_THRESHOLD:-15}"
+
+case "${1:-check}" in
+    record)
+        python -m pytest benchmarks --benchmark-only --benchmark-storage="$STORAGE" --benchmark-save=baseline
+        ;;
+    check)
+        python -m pytest benchmarks --benchmark-only --benchmark-storage="$STORAGE" \
+            --benchmark-compare --benchmark-compare-fail="mean:${THRESHOLD}%" \
+            --benchmark-columns=mean,stddev,rounds
+        ;;
+    *)
+        echo "Usage: $0 [record|check]" >&2
+        exit 2
+        ;;
+esac
@@ -0,0 +1,95 @@
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from config.settings import (
+    LIGHT_CONCURRENCY_LIMIT, LIGHT_QUEUE_MAX_SIZE, LIGHT_REQUEST_TIMEOUT,
+    HEAVY_CONCURRENCY_LIMIT, HEAVY_QUEUE_MAX_SIZE, HEAVY_REQUEST_TIMEOUT,
+    HEAVY_OPERATIONS, OPERATION_CONCURRENCY_LIMITS
+)
+
+
+class ServerBusyError(RuntimeError):
+    pass
+
+
+class JobTimeoutError(TimeoutError):
+    pass
+
+
+# At most `concurrency` jobs run and at most `max_queue` wait; anything beyond is rejected immediately
+class JobGate:
+    def __init__(self, name, concurrency, max_queue=0, timeout=None):
+        self.name = name
+        self.concurrency = max(1, int(concurrency))
+        self.capacity = self.concurrency + max(0, int(max_queue))
+        self.timeout = timeout or None
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix=f"{name}-job")
+        self._lock = threading.Lock()
+        self._admitted = 0
+
+    @property
+    def admitted(self):
+        return self._admitted
+
+    def _release(self, _future):
+        with self._lock:
+            self._admitted -= 1
+
+    def run(self, fn, *args, **kwargs):
+        with self._lock:
+            if self._admitted >= self.capacity:
+                raise ServerBusyError(
+                    f"Server busy: {self.name} queue is full ({self.capacity} jobs), please retry shortly"
+                )
+            self._admitted += 1
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._release(None)
+            raise
+        # A timed-out job that is already running keeps its slot until it really finishes
+        future.add_done_callback(self._release)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            if future.done():
+                # The job itself raised a TimeoutError; surface it unchanged
+                raise
+            future.cancel()
+            logging.warning("%s job %s timed out after %ss", self.name, getattr(fn, "__name__", fn), self.timeout)
+            raise JobTimeoutError(f"Request timed out after {self.timeout:g}s") from None
+
+    def wrap(self, fn):
+        @functools.wraps(fn)
+        def gated(*args, **kwargs):
+            return self.run(fn, *args, **kwargs)
+        return gated
+
+
+# Light and heavy pools, plus a dedicated pool for each operation in OPERATION_CONCURRENCY_LIMITS
+class OperationGates:
+    def __init__(self, prefix=""):
+        self.light = JobGate(f"{prefix}light", LIGHT_CONCURRENCY_LIMIT, LIGHT_QUEUE_MAX_SIZE, LIGHT_REQUEST_TIMEOUT)
+        self.heavy = JobGate(f"{prefix}heavy", HEAVY_CONCURRENCY_LIMIT, HEAVY_QUEUE_MAX_SIZE, HEAVY_REQUEST_TIMEOUT)
+        self.operations = {}
+        for operation, limit in OPERATION_CONCURRENCY_LIMITS.items():
+            heavy = self.is_heavy(operation)
+            self.operations[operation] = JobGate(
+                f"{prefix}{operation}", limit,
+                HEAVY_QUEUE_MAX_SIZE if heavy else LIGHT_QUEUE_MAX_SIZE,
+                HEAVY_REQUEST_TIMEOUT if heavy else LIGHT_REQUEST_TIMEOUT
+            )
+
+    @staticmethod
+    def is_heavy(operation):
+        return operation in HEAVY_OPERATIONS
+
+    def all(self):
+        return [self.light, self.heavy, *self.operations.values()]
+
+    def for_operation(self, operation):
+        if operation in self.operations:
+            return self.operations[operation]
+        return self.heavy if self.is_heavy(operation) else self.light
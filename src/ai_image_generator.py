@@ -1,8 +1,7 @@
 import requests
 import logging
-from PIL import Image
-import io
-from pathlib import Path
+from src.image_io import decode_image
+from src.metrics import phase, track
 
 class AIImageGenerator:
     def __init__(self, openai_key=None, anthropic_key=None):
@@ -23,22 +22,26 @@ class AIImageGenerator:
                 "size": size,
                 "n": 1
             }
-            response = requests.post(
-                "https://api.openai.com/v1/images/generations",
-                headers=headers,
-                json=data,
-                timeout=60
-            )
-            if response.status_code == 200:
-                result = response.json()
-                image_url = result["data"][0]["url"]
-                img_response = requests.get(image_url)
-                img = Image.open(io.BytesIO(img_response.content))
-                output_path = f"generated_image_{hash(prompt) % 10000}.png"
-                img.save(output_path)
-                return output_path, f"✅ Image generated successfully with {model}"
-            else:
-                return None, f"❌ OpenAI API Error: {response.text}"
+            with track("ai_generate_openai"):
+                with phase("network"):
+                    response = requests.post(
+                        "https://api.openai.com/v1/images/generations",
+                        headers=headers,
+                        json=data,
+                        timeout=60
+                    )
+                if response.status_code == 200:
+                    result = response.json()
+                    image_url = result["data"][0]["url"]
+                    with phase("network"):
+                        img_response = requests.get(image_url)
+                    img = decode_image(img_response.content)
+                    output_path = f"generated_image_{hash(prompt) % 10000}.png"
+                    with phase("encode"):
+                        img.save(output_path)
+                    return output_path, f"✅ Image generated successfully with {model}"
+                else:
+                    return None, f"❌ OpenAI API Error: {response.text}"
         except Exception as e:
             logging.exception("OpenAI image generation failed")
             return None, f"❌ Error generating image: {str(e)}"
@@ -60,12 +63,13 @@ class AIImageGenerator:
                     "content": f"Create a detailed visual description for an AI image generator based on this prompt: {prompt}. Make it artistic and detailed."
                 }]
             }
-            response = requests.post(
-                "https://api.anthropic.com/v1/messages",
-                headers=headers,
-                json=data,
-                timeout=30
-            )
+            with track("ai_prompt_anthropic"), phase("network"):
+                response = requests.post(
+                    "https://api.anthropic.com/v1/messages",
+                    headers=headers,
+                    json=data,
+                    timeout=30
+                )
             if response.status_code == 200:
                 result = response.json()
                 enhanced_prompt = result["content"][0]["text"]
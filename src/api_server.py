@@ -0,0 +1,150 @@
+import io
+import json
+import logging
+import zipfile
+from pathlib import Path
+
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+
+from config.logging_config import setup_logging
+from config.settings import API_SERVER_HOST, API_SERVER_PORT, API_MAX_UPLOAD_MB
+from src.admission import JobTimeoutError, OperationGates, ServerBusyError
+from src.guardrails import InputRejectedError
+from src.headless import OPERATIONS, file_extension, media_type, parse_params, run_batch, run_operation
+from src.metrics import render_prometheus
+
+MAX_UPLOAD_BYTES = API_MAX_UPLOAD_MB * 1024 * 1024
+
+app = FastAPI(title="Advanced Image Processing Suite API")
+gates = OperationGates(prefix="api-")
+
+
+def _gate(operation):
+    return gates.for_operation(OPERATIONS[operation][1])
+
+
+async def _read_uploads(request):
+    if int(request.headers.get("content-length") or 0) > MAX_UPLOAD_BYTES:
+        raise HTTPException(413, f"Upload exceeds {API_MAX_UPLOAD_MB} MB")
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        uploads = []
+        for _, value in form.multi_items():
+            if hasattr(value, "read"):
+                uploads.append((value.filename or "image", await value.read()))
+        return uploads
+    # Raw request body (e.g. curl --data-binary @photo.jpg), read as it streams in
+    body = bytearray()
+    async for chunk in request.stream():
+        body.extend(chunk)
+        if len(body) > MAX_UPLOAD_BYTES:
+            raise HTTPException(413, f"Upload exceeds {API_MAX_UPLOAD_MB} MB")
+    return [(request.query_params.get("filename", "image"), bytes(body))] if body else []
+
+
+def _params(operation, request):
+    if operation not in OPERATIONS:
+        raise HTTPException(404, f"Unknown operation '{operation}'")
+    raw = {k: v for k, v in request.query_params.items() if k not in ("filename", "workers")}
+    try:
+        return parse_params(operation, raw)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+
+def _workers(operation, request):
+    try:
+        workers = int(request.query_params.get("workers", 4))
+    except ValueError:
+        raise HTTPException(400, "workers must be an integer")
+    # Batch items are admitted one by one; workers beyond the gate's concurrency would only queue
+    return max(1, min(workers, _gate(operation).concurrency))
+
+
+async def _admit(operation, fn, *args):
+    try:
+        return await run_in_threadpool(_gate(operation).run, fn, *args)
+    except ServerBusyError as e:
+        raise HTTPException(503, str(e), headers={"Retry-After": "5"})
+    except JobTimeoutError as e:
+        raise HTTPException(504, str(e))
+
+
+async def _admit_batch(operation, items, params, workers):
+    # Each item takes its own gate slot and timeout; the batch itself only waits for them
+    try:
+        return await run_in_threadpool(run_batch, operation, items, params, workers, _gate(operation))
+    except ServerBusyError as e:
+        raise HTTPException(503, str(e), headers={"Retry-After": "5"})
+
+
+@app.get("/metrics")
+def metrics():
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/health")
+def health():
+    return {"status": "ok", "operations": list(OPERATIONS)}
+
+
+@app.post("/v1/{operation}")
+async def process(operation: str, request: Request):
+    params = _params(operation, request)
+    uploads = await _read_uploads(request)
+    if len(uploads) != 1:
+        raise HTTPException(400, "Send exactly one image (multipart field or raw body); use /v1/batch for more")
+    try:
+        result = await _admit(operation, run_operation, operation, uploads[0][1], params)
+    except HTTPException:
+        raise
+    except InputRejectedError as e:
+        raise HTTPException(413, str(e))
+    except Exception as e:
+        logging.exception("API %s failed", operation)
+        raise HTTPException(422, f"{operation} failed: {str(e)}")
+    if operation == "analyze":
+        return result
+    data, fmt = result
+    return Response(content=data, media_type=media_type(fmt))
+
+
+@app.post("/v1/batch/{operation}")
+async def process_batch(operation: str, request: Request):
+    params = _params(operation, request)
+    uploads = await _read_uploads(request)
+    if not uploads:
+        raise HTTPException(400, "No images uploaded")
+    workers = _workers(operation, request)
+    results = await _admit_batch(operation, [data for _, data in uploads], params, workers)
+    if operation == "analyze":
+        return [
+            {"file": name, **({"error": error} if error else result)}
+            for (name, _), (result, error) in zip(uploads, results)
+        ]
+    buffer = io.BytesIO()
+    errors = {}
+    with zipfile.ZipFile(buffer, mode="w") as zf:
+        for index, ((name, _), (result, error)) in enumerate(zip(uploads, results)):
+            if error:
+                errors[name] = error
+                continue
+            data, fmt = result
+            zf.writestr(f"{index:03d}_{Path(name).stem}.{file_extension(fmt)}", data)
+        if errors:
+            zf.writestr("errors.json", json.dumps(errors, indent=2))
+    return Response(content=buffer.getvalue(), media_type="application/zip",
+                    headers={"Content-Disposition": f'attachment; filename="{operation}_batch.zip"'})
+
+
+def main():
+    import uvicorn
+    setup_logging()
+    uvicorn.run(app, host=API_SERVER_HOST, port=API_SERVER_PORT)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,44 +1,69 @@
 import requests
 import logging
-from PIL import Image
-import io
 from pathlib import Path
+from src.image_io import as_source_kind, decode_image, emit_result, encode_output, is_path, open_image
+from src.guardrails import preflight
+from src.metrics import phase, record_image, track
+
+class RemoveBgAPIError(RuntimeError):
+    pass
 
 class BackgroundRemover:
     def __init__(self, removebg_key=None):
         self.removebg_key = removebg_key
 
-    def remove_local(self, input_path):
+    def remove_local_image(self, img):
         from rembg import remove
+        return remove(img)
+
+    def remove_with_removebg_bytes(self, data, filename="image.png"):
+        if not self.removebg_key:
+            raise ValueError("Remove.bg API key not provided")
+        record_image(nbytes=len(data))
+        with phase("network"):
+            response = requests.post(
+                'https://api.remove.bg/v1.0/removebg',
+                files={'image_file': (filename, data)},
+                data={'size': 'auto'},
+                headers={'X-Api-Key': self.removebg_key},
+                timeout=30
+            )
+        if response.status_code != 200:
+            raise RemoveBgAPIError(f"Remove.bg API Error: {response.text}")
+        record_image(nbytes=len(response.content), direction="output")
+        return response.content
+
+    def remove_local(self, source):
         try:
-            img = Image.open(input_path)
-            result = remove(img)
-            out_path = Path(input_path).with_name(f"nobg_{Path(input_path).name}")
-            result.save(out_path)
-            return str(out_path), "✅ Background removed locally"
+            with track("remove_background"):
+                plan = preflight(source, "remove_background")
+                img = decode_image(source, plan)
+                with phase("process"):
+                    result = self.remove_local_image(img)
+                output = emit_result(result, source, lambda p: p.with_name(f"nobg_{p.name}"), "PNG")
+            return output, f"✅ Background removed locally{plan.note}"
         except Exception as e:
             logging.exception("Local background removal failed")
             return None, f"❌ Background removal error: {str(e)}"
 
-    def remove_with_removebg(self, input_path):
+    def remove_with_removebg(self, source):
         if not self.removebg_key:
             return None, "❌ Remove.bg API key not provided"
         try:
-            with open(input_path, 'rb') as img_file:
-                response = requests.post(
-                    'https://api.remove.bg/v1.0/removebg',
-                    files={'image_file': img_file},
-                    data={'size': 'auto'},
-                    headers={'X-Api-Key': self.removebg_key},
-                    timeout=30
-                )
-            if response.status_code == 200:
-                out_path = Path(input_path).with_name(f"removebg_{Path(input_path).name}")
-                with open(out_path, 'wb') as out_file:
-                    out_file.write(response.content)
-                return str(out_path), "✅ Background removed with Remove.bg"
-            else:
-                return None, f"❌ Remove.bg API Error: {response.text}"
+            with track("remove_background_api"):
+                if is_path(source):
+                    with open(source, 'rb') as img_file:
+                        content = self.remove_with_removebg_bytes(img_file.read(), Path(source).name)
+                    out_path = Path(source).with_name(f"removebg_{Path(source).name}")
+                    with open(out_path, 'wb') as out_file:
+                        out_file.write(content)
+                    return str(out_path), "✅ Background removed with Remove.bg"
+                if isinstance(source, (bytes, bytearray, memoryview)):
+                    return self.remove_with_removebg_bytes(bytes(source)), "✅ Background removed with Remove.bg"
+                content = self.remove_with_removebg_bytes(encode_output(open_image(source), "PNG"))
+                return as_source_kind(open_image(content), source), "✅ Background removed with Remove.bg"
+        except RemoveBgAPIError as e:
+            return None, f"❌ {str(e)}"
         except Exception as e:
             logging.exception("Remove.bg API background removal failed")
             return None, f"❌ Remove.bg error: {str(e)}"
@@ -0,0 +1,166 @@
+import csv
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+from pathlib import Path
+
+from config.settings import BULK_ANALYSIS_ROOT
+from src.image_analysis import ImageAnalysis
+from src.metrics import phase, track
+
+IMAGE_EXTENSIONS = {
+    ".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff", ".webp", ".gif",
+    ".ico", ".eps", ".psd", ".heic", ".avif", ".jxl"
+}
+RESULT_FIELDS = [
+    "path", "format", "mode", "width", "height", "n_frames", "file_size_bytes",
+    "has_transparency", "mean_red", "mean_green", "mean_blue", "brightness", "metadata_only", "error"
+]
+CHUNK_SIZE = 256
+# Forking the multithreaded server (Gradio, gate threads, torch) can deadlock the child. Pool workers are
+# forked from a clean single-threaded forkserver instead, or spawned where that is unavailable
+POOL_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def resolve_within(path, root):
+    # Relative paths are taken from the root; symlinks and ".." are resolved before the check
+    root = Path(root).resolve()
+    resolved = (root / path).resolve()
+    return resolved if resolved.is_relative_to(root) else None
+
+
+def _candidate_paths(source):
+    if source.is_dir():
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                if Path(name).suffix.lower() in IMAGE_EXTENSIONS:
+                    yield Path(root) / name
+    else:
+        # Manifest file: one image path per line, relative paths resolved against the manifest
+        with open(source, encoding="utf-8") as manifest:
+            for line in manifest:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    path = Path(line)
+                    yield path if path.is_absolute() else source.parent / path
+
+
+def iter_image_paths(source, root=None):
+    source = Path(source)
+    for path in _candidate_paths(source):
+        if root is not None and resolve_within(path, root) is None:
+            logging.warning("Skipping %s: outside %s", path, root)
+            continue
+        yield str(path)
+
+
+def _load_checkpoint(output_path):
+    # Returns the paths already written, whether the header is present, and the metadata_only values seen
+    done, modes = set(), set()
+    if not output_path.exists():
+        return done, False, modes
+    # Drop a trailing partial row (or partial header) left behind by an interrupted run
+    with open(output_path, "rb+") as f:
+        data = f.read()
+        if not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+    if output_path.stat().st_size == 0:
+        return done, False, modes
+    with open(output_path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        if reader.fieldnames != RESULT_FIELDS:
+            raise ValueError(f"{output_path.name} is not a bulk analysis results file from this version")
+        for row in reader:
+            done.add(row["path"])
+            modes.add(row["metadata_only"])
+    return done, True, modes
+
+
+def analyze_dataset(source, output_path="analysis_results.csv", metadata_only=True, workers=4,
+                    root=BULK_ANALYSIS_ROOT):
+    if not source:
+        return None, "❌ Please provide a directory or manifest file"
+    try:
+        resolved_source, output_path = resolve_within(source, root), resolve_within(output_path, root)
+        if resolved_source is None or output_path is None:
+            return None, f"❌ Source and results paths must be inside {root}"
+        source = resolved_source
+        if not source.exists():
+            return None, f"❌ {source} does not exist"
+        done, has_header, modes = _load_checkpoint(output_path)
+        if modes - {str(bool(metadata_only))}:
+            return None, (
+                f"❌ {output_path.name} was written with a different 'metadata only' setting; "
+                "use the same setting or a new results file"
+            )
+        pending = (p for p in iter_image_paths(source, root) if p not in done)
+
+        # Header reads are I/O bound; pixel statistics need real parallelism
+        if metadata_only:
+            executor = ThreadPoolExecutor(max_workers=max(1, int(workers)))
+        else:
+            executor = ProcessPoolExecutor(max_workers=max(1, int(workers)),
+                                           mp_context=multiprocessing.get_context(POOL_START_METHOD))
+        analyze = partial(ImageAnalysis.analyze_record, metadata_only=metadata_only)
+        analyzed, errors = 0, 0
+        # Process-pool workers report into their own process, so chunks are timed from here instead
+        with track("bulk_analysis"), open(output_path, "a", newline="", encoding="utf-8") as out, executor:
+            writer = csv.DictWriter(out, fieldnames=RESULT_FIELDS, extrasaction="ignore")
+            if not has_header:
+                writer.writeheader()
+            while True:
+                chunk = list(islice(pending, CHUNK_SIZE))
+                if not chunk:
+                    break
+                with phase("process"):
+                    records = list(executor.map(analyze, chunk))
+                with phase("encode"):
+                    for record in records:
+                        record["metadata_only"] = bool(metadata_only)
+                        writer.writerow(record)
+                        analyzed += 1
+                        errors += "error" in record
+                    out.flush()
+                    os.fsync(out.fileno())
+        return str(output_path), (
+            f"✅ Analyzed {analyzed} images ({len(done)} resumed from checkpoint, {errors} errors)"
+        )
+    except Exception as e:
+        logging.exception("Bulk analysis failed")
+        return None, f"❌ Bulk analysis error: {str(e)}"
+
+
+def query_results(results_path, min_file_size_mb=None, has_transparency=None, image_format=None,
+                  min_megapixels=None, root=BULK_ANALYSIS_ROOT):
+    results_path = resolve_within(results_path, root)
+    if results_path is None:
+        return {"error": f"Results file must be inside {root}"}
+    if not results_path.exists():
+        return {"error": f"No results at {results_path}; run a bulk analysis first"}
+    matches = []
+    with open(results_path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            if row.get("error"):
+                continue
+            size_mb = int(row["file_size_bytes"]) / (1024 * 1024)
+            megapixels = int(row["width"]) * int(row["height"]) / 1_000_000
+            if min_file_size_mb is not None and size_mb < min_file_size_mb:
+                continue
+            if has_transparency is not None and (row["has_transparency"] == "True") != has_transparency:
+                continue
+            if image_format and row["format"].upper() != image_format.upper():
+                continue
+            if min_megapixels is not None and megapixels < min_megapixels:
+                continue
+            matches.append({
+                "path": row["path"],
+                "dimensions": f"{row['width']} x {row['height']}",
+                "file_size": f"{size_mb:.2f} MB",
+                "format": row["format"],
+                "mode": row["mode"],
+            })
+    return {"count": len(matches), "images": matches}
@@ -0,0 +1,75 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from src.headless import OPERATIONS, file_extension, iter_batch, parse_params
+
+
+def _parse_key_values(pairs):
+    params = {}
+    for pair in pairs:
+        key, sep, value = pair.partition("=")
+        if not sep:
+            raise argparse.ArgumentTypeError(f"Expected key=value, got '{pair}'")
+        params[key] = value
+    return params
+
+
+def _read_input(path):
+    return sys.stdin.buffer.read() if path == "-" else Path(path).read_bytes()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m src.cli",
+        description="Run image operations without the Gradio UI.",
+        epilog='Example: python -m src.cli enhance photos/*.jpg -p type="Noise Reduction" -o out/'
+    )
+    parser.add_argument("operation", choices=list(OPERATIONS))
+    parser.add_argument("inputs", nargs="+", help="Image files, or '-' to read one image from stdin")
+    parser.add_argument("-p", "--param", action="append", default=[], metavar="KEY=VALUE",
+                        help="Operation parameter, e.g. format=WEBP, width=1200, intensity=1.5")
+    parser.add_argument("-o", "--output", default=None,
+                        help="Output directory (default: next to each input), or '-' for stdout")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="Images processed concurrently")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        params = parse_params(args.operation, _parse_key_values(args.param))
+    except (ValueError, argparse.ArgumentTypeError) as e:
+        parser.error(str(e))
+    if args.output == "-" and len(args.inputs) != 1 and args.operation != "analyze":
+        parser.error("--output - writes raw image bytes and needs exactly one input")
+
+    # Inputs are read inside each job and outputs written as they arrive, so memory does not grow with the batch
+    results = iter_batch(args.operation, args.inputs, params, args.workers, load=_read_input)
+
+    failures = 0
+    for path, (result, error) in zip(args.inputs, results):
+        if error:
+            failures += 1
+            print(f"❌ {path}: {error}", file=sys.stderr)
+            continue
+        if args.operation == "analyze":
+            print(json.dumps({"file": path, **result}))
+            continue
+        data, fmt = result
+        if args.output == "-":
+            sys.stdout.buffer.write(data)
+            continue
+        source = Path("stdin" if path == "-" else path)
+        out_dir = Path(args.output) if args.output else source.parent
+        out_dir.mkdir(parents=True, exist_ok=True)
+        out_path = out_dir / f"{source.stem}_{args.operation}.{file_extension(fmt)}"
+        out_path.write_bytes(data)
+        print(f"✅ {path} → {out_path}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+import hashlib
+import logging
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from PIL import Image
+import numpy as np
+import cv2
+
+from src.guardrails import preflight
+from src.metrics import map_in_context, phase, record_image, track
+
+HASH_SIZE = 8
+
+
+def _load_gray(img_path, size):
+    with phase("decode"), Image.open(img_path) as img:
+        # Hashing always works on a tiny proxy, so the plan only enforces the limits; its scale is not needed
+        preflight(img_path, "find_duplicates", header=img)
+        record_image(img, Path(img_path).stat().st_size)
+        # Let the JPEG decoder downscale in the DCT domain instead of decoding full resolution
+        img.draft("L", (size[0] * 4, size[1] * 4))
+        return img.convert("L").resize(size, Image.LANCZOS)
+
+
+def _bits_to_int(bits):
+    return int("".join("1" if bit else "0" for bit in bits.flatten()), 2)
+
+
+def average_hash(img_path, hash_size=HASH_SIZE):
+    pixels = np.asarray(_load_gray(img_path, (hash_size, hash_size)), dtype=np.float32)
+    return _bits_to_int(pixels > pixels.mean())
+
+
+def difference_hash(img_path, hash_size=HASH_SIZE):
+    pixels = np.asarray(_load_gray(img_path, (hash_size + 1, hash_size)), dtype=np.float32)
+    return _bits_to_int(pixels[:, 1:] > pixels[:, :-1])
+
+
+def perceptual_hash(img_path, hash_size=HASH_SIZE, highfreq_factor=4):
+    size = hash_size * highfreq_factor
+    pixels = np.asarray(_load_gray(img_path, (size, size)), dtype=np.float32)
+    low_freq = cv2.dct(pixels)[:hash_size, :hash_size]
+    # The DC term only encodes average brightness, keep it out of the threshold
+    median = np.median(low_freq.flatten()[1:])
+    return _bits_to_int(low_freq > median)
+
+
+HASH_FUNCTIONS = {
+    "aHash": average_hash,
+    "dHash": difference_hash,
+    "pHash": perceptual_hash,
+}
+
+
+def hamming_distance(a, b):
+    return (a ^ b).bit_count()
+
+
+class BKTree:
+    def __init__(self, distance=hamming_distance):
+        self.distance = distance
+        self.root = None
+
+    def add(self, key, value):
+        if self.root is None:
+            self.root = [key, [value], {}]
+            return
+        node = self.root
+        while True:
+            d = self.distance(key, node[0])
+            if d == 0:
+                node[1].append(value)
+                return
+            child = node[2].get(d)
+            if child is None:
+                node[2][d] = [key, [value], {}]
+                return
+            node = child
+
+    def search(self, key, max_distance):
+        matches = []
+        candidates = [self.root] if self.root is not None else []
+        while candidates:
+            node = candidates.pop()
+            d = self.distance(key, node[0])
+            if d <= max_distance:
+                matches.extend((d, value) for value in node[1])
+            # Triangle inequality: only subtrees within [d - r, d + r] can hold matches
+            for child_d, child in node[2].items():
+                if d - max_distance <= child_d <= d + max_distance:
+                    candidates.append(child)
+        return matches
+
+
+def compute_hashes(paths, method="pHash", workers=4):
+    hash_fn = HASH_FUNCTIONS[method]
+
+    def safe_hash(path):
+        try:
+            return hash_fn(path)
+        except Exception:
+            logging.exception("Perceptual hashing failed for %s", path)
+            return None
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return map_in_context(executor, safe_hash, paths)
+
+
+def find_duplicate_clusters(paths, method="pHash", threshold=5):
+    with track("find_duplicates"):
+        paths = list(paths)
+        hashes = compute_hashes(paths, method)
+        with phase("process"):
+            return _cluster(hashes, threshold)
+
+
+def _cluster(hashes, threshold):
+    tree = BKTree()
+    for index, value in enumerate(hashes):
+        if value is not None:
+            tree.add(value, index)
+    assigned = [False] * len(hashes)
+    clusters = []
+    for index, value in enumerate(hashes):
+        if assigned[index]:
+            continue
+        members = [index]
+        assigned[index] = True
+        if value is not None:
+            for _, other in sorted(tree.search(value, threshold)):
+                if not assigned[other]:
+                    assigned[other] = True
+                    members.append(other)
+        clusters.append(sorted(members))
+    return clusters
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def identical_clusters(paths, method="pHash"):
+    # Hashes work on greyscale, so a black-and-white or sepia copy matches its original even at distance 0;
+    # hash clusters are split by file digest so only truly identical files end up together
+    paths = list(paths)
+    clusters = []
+    for cluster in find_duplicate_clusters(paths, method, threshold=0):
+        if len(cluster) == 1:
+            clusters.append(cluster)
+            continue
+        groups = {}
+        for index in cluster:
+            groups.setdefault(file_digest(paths[index]), []).append(index)
+        clusters.extend(groups.values())
+    return sorted(clusters)
+
+
+def copy_for_duplicate(output, source_path, duplicate_path):
+    # Same bytes as the representative's output, named (and placed) after the duplicate it stands in for.
+    # Operations only add a prefix or change the suffix, so the source stem is the tail of the output stem
+    output = Path(output)
+    source_stem, duplicate_stem = Path(source_path).stem, Path(duplicate_path).stem
+    if output.stem.endswith(source_stem):
+        name = f"{output.stem[:len(output.stem) - len(source_stem)]}{duplicate_stem}{output.suffix}"
+    else:
+        name = f"{output.stem}_{duplicate_stem}{output.suffix}"
+    target = Path(duplicate_path).with_name(name)
+    if target.resolve() != output.resolve():
+        shutil.copyfile(output, target)
+    return str(target)
+
+
+def find_duplicates(paths, method="pHash", threshold=5):
+    if not paths:
+        return {"error": "No images provided"}
+    try:
+        clusters = find_duplicate_clusters(paths, method, int(threshold))
+        duplicates = [[str(paths[i]) for i in cluster] for cluster in clusters if len(cluster) > 1]
+        return {
+            "images": len(paths),
+            "unique": len(clusters),
+            "duplicate_clusters": duplicates,
+        }
+    except Exception as e:
+        logging.exception("Duplicate detection failed")
+        return {"error": f"Duplicate detection failed: {str(e)}"}
@@ -0,0 +1,104 @@
+import logging
+import math
+import warnings
+from dataclasses import dataclass
+from PIL import Image
+
+from config.settings import (
+    MAX_IMAGE_PIXELS, MAX_IMAGE_FRAMES, MAX_INPUT_FILE_MB, OPERATION_MEMORY_BUDGET_MB, OVERSIZE_POLICY,
+    OPERATION_MEMORY_BUDGETS_MB, OPERATION_PIXEL_LIMITS
+)
+from src.image_io import is_path, open_image, source_nbytes
+
+# Pillow checks the pixel count while parsing the header; make that check strict everywhere,
+# including uploads that Gradio decodes before our handlers run
+Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+warnings.simplefilter("error", Image.DecompressionBombWarning)
+
+BYTES_PER_PIXEL = {"1": 1, "L": 1, "P": 1, "LA": 2, "RGB": 3, "YCbCr": 3, "RGBA": 4, "CMYK": 4, "I": 4, "F": 4}
+
+# Peak working set as a multiple of the decoded buffer, measured roughly from what each path allocates
+OPERATION_COST = {
+    "convert": 2.5,
+    "enhance": 3,
+    "enhance:AI Super Resolution": 6,
+    "enhance:Noise Reduction": 6,
+    "enhance:HDR Effect": 10,
+    "enhance:Vignette": 4,
+    "resize_crop": 2,
+    "resize_crop:Smart Crop": 2.5,
+    "custom_filter": 3,
+    "custom_filter:hue": 40,
+    "remove_background": 8,
+    "renditions": 3,
+    "analysis": 2,
+    "analysis:metadata": 0,
+    "find_duplicates": 1.5,
+}
+
+
+class InputRejectedError(ValueError):
+    pass
+
+
+@dataclass
+class Plan:
+    operation: str
+    width: int
+    height: int
+    mode: str
+    frames: int
+    estimated_bytes: int
+    scale: float = 1.0
+
+    @property
+    def note(self):
+        if self.scale >= 1:
+            return ""
+        w, h = self.target_size
+        return f" (input downscaled from {self.width}x{self.height} to {w}x{h} to fit limits)"
+
+    @property
+    def target_size(self):
+        return max(1, int(self.width * self.scale)), max(1, int(self.height * self.scale))
+
+
+def estimate_memory(width, height, mode, operation, variant=None):
+    factor = OPERATION_COST.get(f"{operation}:{variant}", OPERATION_COST.get(operation, 3))
+    # Most paths convert to RGB at some point, so never assume fewer than 3 bytes per pixel
+    return int(width * height * max(BYTES_PER_PIXEL.get(mode, 4), 3) * factor)
+
+
+# `header` is an already-opened image for `source`, for callers that need it anyway and should not parse it twice
+def preflight(source, operation, variant=None, allow_downscale=True, header=None):
+    nbytes = source_nbytes(source)
+    if nbytes is not None and nbytes > MAX_INPUT_FILE_MB * 1024 * 1024:
+        raise InputRejectedError(f"File is {nbytes / 1024 / 1024:.1f} MB, the limit is {MAX_INPUT_FILE_MB} MB")
+    try:
+        # Only the header is parsed here; pixel data stays on disk
+        img = header if header is not None else open_image(source)
+    except (Image.DecompressionBombError, Image.DecompressionBombWarning) as e:
+        raise InputRejectedError(str(e)) from None
+    plan = Plan(operation, img.width, img.height, img.mode, getattr(img, "n_frames", 1),
+                estimate_memory(img.width, img.height, img.mode, operation, variant))
+    # Only close handles opened here; a caller's stream must stay usable for the decode that follows
+    if header is None and (is_path(source) or isinstance(source, (bytes, bytearray, memoryview))):
+        img.close()
+    if plan.frames > MAX_IMAGE_FRAMES:
+        raise InputRejectedError(f"Image has {plan.frames} frames, the limit is {MAX_IMAGE_FRAMES}")
+
+    pixel_limit = OPERATION_PIXEL_LIMITS.get(operation, MAX_IMAGE_PIXELS)
+    memory_budget = OPERATION_MEMORY_BUDGETS_MB.get(operation, OPERATION_MEMORY_BUDGET_MB) * 1024 * 1024
+    ratio = min(pixel_limit / (plan.width * plan.height), memory_budget / max(1, plan.estimated_bytes))
+    if ratio >= 1:
+        return plan
+    if OVERSIZE_POLICY != "downscale" or not allow_downscale:
+        raise InputRejectedError(
+            f"{plan.width}x{plan.height} {plan.mode} needs ~{plan.estimated_bytes / 1024 / 1024:.0f} MB for "
+            f"{operation}{f' ({variant})' if variant else ''}, over the "
+            f"{memory_budget / 1024 / 1024:.0f} MB / {pixel_limit / 1e6:g} MP budget"
+        )
+    # Both pixel count and memory scale with the area, so the side length scales with the square root
+    plan.scale = math.sqrt(ratio)
+    logging.info("Downscaling %sx%s input for %s by %.3f to fit budget", plan.width, plan.height, operation, plan.scale)
+    return plan
@@ -0,0 +1,168 @@
+import inspect
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+
+from config.settings import REMOVE_BG_API_KEY
+from src.admission import JobTimeoutError, ServerBusyError
+from src.background_removal import BackgroundRemover
+from src.custom_filters import filter_image
+from src.guardrails import preflight
+from src.image_analysis import ImageAnalysis
+from src.image_io import decode_image, encode_output, normalize_format, open_image
+from src.image_processing import ENHANCEMENT_TYPES, ImageProcessor
+from src.metadata import carry_metadata
+from src.metrics import phase, record_image, track
+from src.resize_crop import DOWNSCALABLE_MODES, RESAMPLE_FILTERS, RESIZE_MODES, resize_crop
+
+processor = ImageProcessor()
+bg_remover = BackgroundRemover(removebg_key=REMOVE_BG_API_KEY)
+
+FILE_EXTENSIONS = {"JPEG": "jpg", "TIFF": "tif"}
+# Parameters with a fixed set of values; anything else would silently fall through to a no-op
+PARAM_CHOICES = {
+    "enhance": {"type": ENHANCEMENT_TYPES},
+    "resize": {"mode": RESIZE_MODES, "filter": RESAMPLE_FILTERS},
+    "remove-background": {"service": ["local", "removebg"]},
+}
+
+
+def _output_format(img, output_format):
+    return normalize_format(output_format or img.format or "PNG")
+
+
+def convert(data, format="PNG", quality=95):
+    fmt = normalize_format(format)
+    plan = preflight(data, "convert", allow_downscale=False)
+    return encode_output(decode_image(data, plan), fmt, quality), fmt
+
+
+def enhance(data, type="Color Enhancement", intensity=1.0, format="", quality=95):
+    img = decode_image(data, preflight(data, "enhance", type))
+    fmt = _output_format(img, format)
+    with phase("process"):
+        result = carry_metadata(img, processor.enhance(img, type, intensity))
+    return encode_output(result, fmt, quality), fmt
+
+
+def resize(data, mode="Resize", width=800, height=600, maintain_ratio=True, filter="LANCZOS", faces=False,
+           format="", quality=95):
+    plan = preflight(data, "resize_crop", mode, allow_downscale=mode in DOWNSCALABLE_MODES)
+    img = decode_image(data, plan)
+    fmt = _output_format(img, format)
+    with phase("process"):
+        result = resize_crop(img, mode, width, height, maintain_ratio, filter.upper(), faces)
+    return encode_output(result, fmt, quality), fmt
+
+
+def custom_filter(data, brightness=0.0, contrast=0.0, saturation=0.0, hue=0.0, format="", quality=95):
+    img = decode_image(data, preflight(data, "custom_filter", "hue" if hue else None))
+    fmt = _output_format(img, format)
+    with phase("process"):
+        result = filter_image(img, brightness, contrast, saturation, hue)
+    return encode_output(result, fmt, quality), fmt
+
+
+def analyze(data):
+    with phase("decode"):
+        img = open_image(data)
+    plan = preflight(data, "analysis", header=img)
+    record_image(img, len(data))
+    with phase("process"):
+        return ImageAnalysis.analyze(img, len(data), plan)
+
+
+def remove_background(data, service="local"):
+    if service == "removebg":
+        return bg_remover.remove_with_removebg_bytes(data), "PNG"
+    img = decode_image(data, preflight(data, "remove_background"))
+    with phase("process"):
+        result = bg_remover.remove_local_image(img)
+    return encode_output(result, "PNG"), "PNG"
+
+
+# name -> (handler, operation name shared with the Gradio app's admission gates and metrics)
+OPERATIONS = {
+    "convert": (convert, "convert"),
+    "enhance": (enhance, "enhance"),
+    "resize": (resize, "resize_crop"),
+    "filter": (custom_filter, "custom_filter"),
+    "analyze": (analyze, "analysis"),
+    "remove-background": (remove_background, "remove_background"),
+}
+
+
+def _coerce(value, default):
+    if isinstance(default, bool):
+        return str(value).lower() in ("1", "true", "yes", "on")
+    if isinstance(default, int):
+        return int(value)
+    if isinstance(default, float):
+        return float(value)
+    return value
+
+
+def _choice(key, value, choices):
+    for choice in choices:
+        if choice.casefold() == str(value).casefold():
+            return choice
+    raise ValueError(f"Invalid {key} '{value}', expected one of: {', '.join(choices)}")
+
+
+def parse_params(operation, raw_params):
+    if operation not in OPERATIONS:
+        raise ValueError(f"Unknown operation '{operation}', expected one of: {', '.join(OPERATIONS)}")
+    signature = inspect.signature(OPERATIONS[operation][0])
+    choices = PARAM_CHOICES.get(operation, {})
+    params = {}
+    for key, value in raw_params.items():
+        key = key.replace("-", "_")
+        if key not in signature.parameters or key == "data":
+            raise ValueError(f"Unknown parameter '{key}' for {operation}")
+        if key in choices:
+            params[key] = _choice(key, value, choices[key])
+        else:
+            params[key] = _coerce(value, signature.parameters[key].default)
+    return params
+
+
+def run_operation(operation, data, params=None):
+    handler, name = OPERATIONS[operation]
+    with track(name):
+        return handler(data, **(params or {}))
+
+
+# Yields (result, exception) per item, in order. Each item is loaded and admitted through `gate` inside its own
+# job, so a batch holds at most `workers` inputs at once and never runs more jobs than the gate allows
+def iter_batch(operation, items, params=None, workers=4, gate=None, load=None):
+    def run_one(item):
+        try:
+            data = load(item) if load else item
+            if gate is None:
+                return run_operation(operation, data, params), None
+            return gate.run(run_operation, operation, data, params), None
+        except (ServerBusyError, JobTimeoutError) as e:
+            logging.warning("Headless %s item not completed: %s", operation, e)
+            return None, e
+        except Exception as e:
+            logging.exception("Headless %s failed", operation)
+            return None, e
+
+    with ThreadPoolExecutor(max_workers=max(1, int(workers))) as executor:
+        yield from executor.map(run_one, items)
+
+
+def run_batch(operation, items, params=None, workers=4, gate=None, load=None):
+    results = list(iter_batch(operation, items, params, workers, gate, load))
+    if gate is not None and results and all(isinstance(error, ServerBusyError) for _, error in results):
+        # Nothing was admitted, so this is a busy server rather than a batch of failed images
+        raise results[0][1]
+    return [(result, str(error) if error else None) for result, error in results]
+
+
+def media_type(fmt):
+    return Image.MIME.get(fmt, "application/octet-stream")
+
+
+def file_extension(fmt):
+    return FILE_EXTENSIONS.get(fmt, fmt.lower())
@@ -2,31 +2,78 @@ import logging
 from PIL import Image
 import numpy as np
 from pathlib import Path
+from src.guardrails import preflight
+from src.image_io import is_empty, load_for_plan, open_header, open_image, source_nbytes
+from src.metrics import phase, record_image, track
 
 class ImageAnalysis:
     @staticmethod
-    def analyze_image(img_path):
-        if not img_path:
+    def analyze(img, file_size=None, plan=None):
+        analysis = {
+            "dimensions": f"{img.width} x {img.height}",
+            "format": img.format,
+            "mode": img.mode,
+            "file_size": f"{file_size / 1024:.1f} KB" if file_size is not None else "N/A",
+            "has_transparency": img.mode in ("RGBA", "LA") or "transparency" in img.info,
+            "color_palette": "Analyzed" if img.mode == "P" else "N/A"
+        }
+        if img.mode == "RGB":
+            # Averages survive downscaling, so over-budget inputs are sampled at the planned size
+            img_array = np.asarray(load_for_plan(img, plan))
+            analysis["average_color"] = {
+                "red": int(np.mean(img_array[:,:,0])),
+                "green": int(np.mean(img_array[:,:,1])),
+                "blue": int(np.mean(img_array[:,:,2]))
+            }
+            analysis["brightness"] = int(np.mean(img_array))
+        return analysis
+
+    @staticmethod
+    def analyze_image(source):
+        if is_empty(source):
             return {"error": "No image provided"}
         try:
-            img = Image.open(img_path)
-            analysis = {
-                "dimensions": f"{img.width} x {img.height}",
-                "format": img.format,
-                "mode": img.mode,
-                "file_size": f"{Path(img_path).stat().st_size / 1024:.1f} KB",
-                "has_transparency": img.mode in ("RGBA", "LA") or "transparency" in img.info,
-                "color_palette": "Analyzed" if img.mode == "P" else "N/A"
-            }
-            if img.mode == "RGB":
-                img_array = np.array(img)
-                analysis["average_color"] = {
-                    "red": int(np.mean(img_array[:,:,0])),
-                    "green": int(np.mean(img_array[:,:,1])),
-                    "blue": int(np.mean(img_array[:,:,2]))
-                }
-                analysis["brightness"] = int(np.mean(img_array))
-            return analysis
+            with track("analysis"):
+                # Header only: pixels are decoded inside analyze() when statistics need them
+                with phase("decode"):
+                    img = open_image(source)
+                plan = preflight(source, "analysis", header=img)
+                file_size = source_nbytes(source)
+                record_image(img, file_size)
+                with phase("process"):
+                    return ImageAnalysis.analyze(img, file_size, plan)
         except Exception as e:
             logging.exception("Image analysis failed")
             return {"error": f"Analysis failed: {str(e)}"}
+
+    @staticmethod
+    def analyze_record(img_path, metadata_only=True):
+        record = {"path": str(img_path)}
+        try:
+            record["file_size_bytes"] = Path(img_path).stat().st_size
+            # Image.open only parses the header; pixel data is decoded on first access.
+            # Metadata rows never decode, so the largest assets are still listed instead of becoming errors
+            with (open_header(img_path) if metadata_only else Image.open(img_path)) as img:
+                plan = None if metadata_only else preflight(img_path, "analysis", header=img)
+                record.update({
+                    "format": img.format,
+                    "mode": img.mode,
+                    "width": img.width,
+                    "height": img.height,
+                    "n_frames": getattr(img, "n_frames", 1),
+                    "has_transparency": img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info,
+                })
+                if not metadata_only:
+                    pixels = load_for_plan(img, plan)
+                    if img.mode in ("RGB", "RGBA"):
+                        img_array = np.asarray(pixels)
+                        record["mean_red"] = int(np.mean(img_array[:, :, 0]))
+                        record["mean_green"] = int(np.mean(img_array[:, :, 1]))
+                        record["mean_blue"] = int(np.mean(img_array[:, :, 2]))
+                        record["brightness"] = int(np.mean(img_array[:, :, :3]))
+                    elif img.mode == "L":
+                        record["brightness"] = int(np.mean(np.asarray(pixels)))
+        except Exception as e:
+            logging.exception("Image analysis failed for %s", img_path)
+            record["error"] = str(e)
+        return record
@@ -0,0 +1,177 @@
+import io
+import os
+import struct
+from contextlib import contextmanager
+from pathlib import Path
+from PIL import Image, UnidentifiedImageError
+import numpy as np
+from src.metadata import apply_orientation, match_output_color, metadata_save_kwargs
+from src.metrics import phase, record_image
+
+FORMAT_ALIASES = {"JPG": "JPEG", "TIF": "TIFF"}
+
+
+def normalize_format(output_format):
+    output_format = output_format.upper()
+    return FORMAT_ALIASES.get(output_format, output_format)
+
+
+def prepare_for_format(img, output_format):
+    if output_format.upper() in ["JPEG", "JPG", "BMP", "PDF"]:
+        if img.mode in ("RGBA", "LA", "P"):
+            background = Image.new("RGB", img.size, (255, 255, 255))
+            if img.mode == "P":
+                img = img.convert("RGBA")
+            background.paste(img, mask=img.split()[-1] if img.mode in ("RGBA", "LA") else None)
+            img = background
+        else:
+            img = img.convert("RGB")
+    elif output_format.upper() == "PNG":
+        if img.mode != "RGBA":
+            img = img.convert("RGBA")
+    elif output_format.upper() in ["TIFF", "TIF"]:
+        pass
+    else:
+        img = img.convert("RGB")
+    return img
+
+
+def format_save_kwargs(output_format, quality=95):
+    if output_format.upper() in ["JPEG", "JPG"]:
+        return {"quality": quality, "optimize": True}
+    elif output_format.upper() == "PNG":
+        return {"optimize": True}
+    elif output_format.upper() == "WEBP":
+        return {"quality": quality, "method": 6}
+    elif output_format.upper() == "AVIF":
+        return {"quality": quality}
+    return {}
+
+
+def is_path(source):
+    return isinstance(source, (str, os.PathLike))
+
+
+def is_empty(source):
+    return source is None or (isinstance(source, (str, bytes)) and not source)
+
+
+def open_image(source):
+    if isinstance(source, Image.Image):
+        return source
+    if isinstance(source, np.ndarray):
+        # Shares the array's buffer for contiguous uint8 data instead of copying it
+        return Image.fromarray(source)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    return Image.open(source)
+
+
+@contextmanager
+def open_header(path):
+    # Header-only reads allocate no pixel buffer, so this skips the decompression-bomb check Image.open applies.
+    # The check is a process-wide warnings filter; it is bypassed here locally rather than relaxed for every thread.
+    Image.init()
+    with open(path, "rb") as fp:
+        prefix = fp.read(16)
+        for image_format in Image.ID:
+            factory, accept = Image.OPEN[image_format]
+            accepted = not accept or accept(prefix)
+            if not accepted or isinstance(accepted, str):
+                continue
+            fp.seek(0)
+            try:
+                img = factory(fp, os.fspath(path))
+            except (SyntaxError, IndexError, TypeError, struct.error):
+                continue
+            with img:
+                yield img
+            return
+    raise UnidentifiedImageError(f"cannot identify image file {os.fspath(path)!r}")
+
+
+def source_nbytes(source):
+    if is_path(source):
+        return Path(source).stat().st_size
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return len(source)
+    return None
+
+
+def load_for_plan(img, plan=None):
+    if plan is None or plan.scale >= 1:
+        img.load()
+        return img
+    source_format = img.format
+    target = plan.target_size
+    # JPEG decodes straight to 1/2, 1/4 or 1/8 scale; other formats ignore the draft request
+    img.draft(img.mode, target)
+    img.load()
+    if img.size != target:
+        img = img.resize(target, Image.LANCZOS, reducing_gap=2.0)
+        img.format = source_format
+    return img
+
+
+def decode_image(source, plan=None):
+    with phase("decode"):
+        img = apply_orientation(load_for_plan(open_image(source), plan))
+    record_image(img, source_nbytes(source))
+    return img
+
+
+def encode_output(img, output_format, quality=95, keep_metadata=True):
+    with phase("encode"):
+        data = encode_image(img, output_format, quality, keep_metadata)
+    record_image(img, len(data), direction="output")
+    return data
+
+
+def as_source_kind(img, source, source_format=None, quality=95):
+    if isinstance(source, np.ndarray):
+        return np.asarray(img)
+    if isinstance(source, (bytes, bytearray, memoryview)) or hasattr(source, "read"):
+        return encode_image(img, source_format or "PNG", quality)
+    return img
+
+
+# Path handling lives only here: paths in get a file written next to them, anything else gets the same kind back
+def emit_result(img, source, out_path_fn, source_format=None):
+    with phase("encode"):
+        if is_path(source):
+            output = out_path_fn(Path(source))
+            output_format = Image.registered_extensions().get(output.suffix.lower())
+            img = match_output_color(img, output_format)
+            img.save(output, **metadata_save_kwargs(img, output_format))
+            output = str(output)
+        else:
+            output = as_source_kind(img, source, source_format)
+    record_image(img, source_nbytes(output), direction="output")
+    return output
+
+
+def prepare_for_output(img, output_format):
+    # Returns the image to save and the EXIF/ICC kwargs that describe its pixels after any mode change
+    output_format = normalize_format(output_format)
+    prepared = prepare_for_format(img, output_format)
+    managed = match_output_color(img, output_format, prepared.mode)
+    if managed is not img:
+        img, prepared = managed, prepare_for_format(managed, output_format)
+    save_kwargs = metadata_save_kwargs(img, output_format, prepared.mode)
+    if "icc_profile" in prepared.info and "icc_profile" not in save_kwargs:
+        # Some encoders embed info["icc_profile"] on their own, which would mislabel the converted pixels
+        prepared.info = {key: value for key, value in prepared.info.items() if key != "icc_profile"}
+    return prepared, save_kwargs
+
+
+def encode_image(img, output_format, quality=95, keep_metadata=True):
+    output_format = normalize_format(output_format)
+    save_kwargs = format_save_kwargs(output_format, quality)
+    if keep_metadata:
+        img, metadata_kwargs = prepare_for_output(img, output_format)
+        save_kwargs.update(metadata_kwargs)
+    else:
+        img = prepare_for_format(img, output_format)
+    buffer = io.BytesIO()
+    img.save(buffer, format=output_format, **save_kwargs)
+    return buffer.getvalue()
@@ -0,0 +1,92 @@
+import io
+import logging
+from functools import lru_cache
+from PIL import ExifTags, ImageOps
+
+try:
+    from PIL import ImageCms
+except ImportError:
+    ImageCms = None
+
+ORIENTATION = ExifTags.Base.Orientation
+EXIF_FORMATS = {"JPEG", "PNG", "WEBP", "AVIF"}
+ICC_FORMATS = {"JPEG", "PNG", "WEBP", "TIFF", "AVIF"}
+# Input mode -> output mode for colour transforms to sRGB
+SRGB_MODES = {"RGB": "RGB", "RGBA": "RGBA", "CMYK": "RGB", "L": "RGB"}
+_COLOR_SPACES = {"RGBA": "RGB", "RGBX": "RGB", "LA": "L", "PA": "P"}
+
+_srgb_profile = ImageCms.createProfile("sRGB") if ImageCms else None
+
+
+def apply_orientation(img):
+    if img.getexif().get(ORIENTATION, 1) == 1:
+        return img
+    source_format = img.format
+    # A transpose on the decoded buffer; exif_transpose also drops the tag so it is not applied twice
+    img = ImageOps.exif_transpose(img)
+    img.format = source_format
+    return img
+
+
+def same_color_space(mode, other_mode):
+    return _COLOR_SPACES.get(mode, mode) == _COLOR_SPACES.get(other_mode, other_mode)
+
+
+def carry_metadata(source, result):
+    if result is source:
+        return result
+    if "exif" in source.info:
+        result.info.setdefault("exif", source.info["exif"])
+    # A profile only describes pixels in the colour space it was made for
+    if "icc_profile" in source.info and same_color_space(source.mode, result.mode):
+        result.info.setdefault("icc_profile", source.info["icc_profile"])
+    return result
+
+
+@lru_cache(maxsize=32)
+def _srgb_transform(icc_profile, mode):
+    profile = ImageCms.ImageCmsProfile(io.BytesIO(icc_profile))
+    if mode in ("RGB", "RGBA") and "sRGB" in ImageCms.getProfileDescription(profile):
+        return None
+    return ImageCms.buildTransform(profile, _srgb_profile, mode, SRGB_MODES[mode])
+
+
+def to_srgb(img):
+    icc_profile = img.info.get("icc_profile")
+    if not icc_profile or ImageCms is None or img.mode not in SRGB_MODES:
+        return img
+    try:
+        transform = _srgb_transform(icc_profile, img.mode)
+    except (ImageCms.PyCMSError, OSError):
+        logging.warning("Ignoring unreadable ICC profile")
+        return img
+    if transform is None:
+        return img
+    source_format = img.format
+    result = ImageCms.applyTransform(img, transform)
+    result.info = {key: value for key, value in img.info.items() if key != "icc_profile"}
+    result.format = source_format
+    return result
+
+
+def match_output_color(img, output_format, output_mode=None):
+    # Keep the embedded profile when the saved pixels stay in its colour space; otherwise bake the colours into sRGB
+    if not img.info.get("icc_profile"):
+        return img
+    if output_format in ICC_FORMATS and same_color_space(img.mode, output_mode or img.mode):
+        return img
+    return to_srgb(img)
+
+
+def metadata_save_kwargs(img, output_format, output_mode=None):
+    kwargs = {}
+    icc_profile = img.info.get("icc_profile")
+    if output_format in ICC_FORMATS and icc_profile and same_color_space(img.mode, output_mode or img.mode):
+        kwargs["icc_profile"] = icc_profile
+    if output_format in EXIF_FORMATS:
+        exif = img.getexif()
+        if len(exif):
+            # Pixels are always stored upright after decode
+            exif.pop(ORIENTATION, None)
+            kwargs["exif"] = exif.tobytes()
+    return kwargs
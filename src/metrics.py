@@ -0,0 +1,188 @@
+import bisect
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config.settings import OTEL_TRACING_ENABLED
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:
+    otel_trace = None
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+BYTES_BUCKETS = tuple(16 * 1024 * 4 ** i for i in range(8))
+MEGAPIXEL_BUCKETS = (0.1, 0.5, 1, 2, 5, 12, 24, 50, 100)
+
+_tracer = otel_trace.get_tracer("image-processing-suite") if otel_trace and OTEL_TRACING_ENABLED else None
+_current = contextvars.ContextVar("current_operation", default=None)
+REGISTRY = []
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=SECONDS_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    le = 'le="+Inf"' if bound == float("inf") else f'le="{bound:g}"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+OPERATIONS_TOTAL = Counter("image_operations_total", "Image operations started", ["operation"])
+OPERATION_ERRORS = Counter("image_operation_errors_total", "Image operations that raised", ["operation"])
+OPERATION_SECONDS = Histogram("image_operation_seconds", "End-to-end operation latency", ["operation"])
+PHASE_SECONDS = Histogram("image_phase_seconds", "Latency of decode/process/encode/network phases",
+                          ["operation", "phase"])
+IMAGES_TOTAL = Counter("image_images_total", "Images seen per operation, direction and mode",
+                       ["operation", "direction", "mode"])
+IMAGE_MEGAPIXELS = Histogram("image_megapixels", "Image size in megapixels", ["operation", "direction"],
+                             MEGAPIXEL_BUCKETS)
+IMAGE_BYTES = Histogram("image_bytes", "Encoded image size in bytes", ["operation", "direction"], BYTES_BUCKETS)
+
+
+def _span(name):
+    return _tracer.start_as_current_span(name) if _tracer else nullcontext()
+
+
+@contextmanager
+def track(operation):
+    token = _current.set(operation)
+    start = time.perf_counter()
+    OPERATIONS_TOTAL.inc(operation=operation)
+    try:
+        with _span(f"image.{operation}"):
+            yield
+    except Exception:
+        OPERATION_ERRORS.inc(operation=operation)
+        raise
+    finally:
+        OPERATION_SECONDS.observe(time.perf_counter() - start, operation=operation)
+        _current.reset(token)
+
+
+@contextmanager
+def phase(name):
+    operation = _current.get() or "untracked"
+    start = time.perf_counter()
+    try:
+        with _span(f"image.{operation}.{name}"):
+            yield
+    finally:
+        PHASE_SECONDS.observe(time.perf_counter() - start, operation=operation, phase=name)
+
+
+def submit_in_context(executor, fn, *args):
+    # Thread pools do not inherit contextvars; a fresh copy per job keeps its phases under the current operation
+    return executor.submit(contextvars.copy_context().run, fn, *args)
+
+
+def map_in_context(executor, fn, items):
+    return [future.result() for future in [submit_in_context(executor, fn, item) for item in items]]
+
+
+def record_image(img=None, nbytes=None, direction="input"):
+    operation = _current.get() or "untracked"
+    if img is not None:
+        IMAGES_TOTAL.inc(operation=operation, direction=direction, mode=img.mode)
+        IMAGE_MEGAPIXELS.observe(img.width * img.height / 1_000_000, operation=operation, direction=direction)
+    if nbytes is not None:
+        IMAGE_BYTES.observe(nbytes, operation=operation, direction=direction)
+    if _tracer and img is not None:
+        span = otel_trace.get_current_span()
+        span.set_attribute(f"image.{direction}.width", img.width)
+        span.set_attribute(f"image.{direction}.height", img.height)
+        span.set_attribute(f"image.{direction}.mode", img.mode)
+        if nbytes is not None:
+            span.set_attribute(f"image.{direction}.bytes", nbytes)
+
+
+def render_prometheus():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port, host="0.0.0.0"):
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    logging.info("Serving Prometheus metrics on http://%s:%s/metrics", host, port)
+    return server
@@ -0,0 +1,90 @@
+import json
+import logging
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from PIL import Image
+
+from src.guardrails import preflight
+from src.image_io import decode_image, encode_output
+from src.metadata import to_srgb
+from src.metrics import map_in_context, phase, track
+
+RENDITION_FORMATS = {
+    "WEBP": ("webp", "image/webp"),
+    "JPEG": ("jpg", "image/jpeg"),
+    "PNG": ("png", "image/png"),
+    "AVIF": ("avif", "image/avif"),
+}
+DEFAULT_WIDTHS = [320, 640, 960, 1280, 1920]
+
+
+def parse_widths(widths):
+    if isinstance(widths, str):
+        widths = [w for w in widths.replace(";", ",").split(",") if w.strip()]
+    return sorted({int(w) for w in widths if int(w) > 0}, reverse=True)
+
+
+def build_pyramid(img, widths, resample=Image.LANCZOS):
+    if img.mode not in ("RGB", "RGBA", "L", "LA"):
+        img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+    levels = {}
+    current = img
+    for width in sorted(set(widths), reverse=True):
+        if width >= img.width:
+            levels[img.width] = img
+            continue
+        # Halve with a cheap box filter while we are far above the target, then finish with a quality resample
+        while current.width >= width * 2:
+            current = current.reduce(2)
+        height = max(1, round(img.height * width / img.width))
+        current = current.resize((width, height), resample)
+        levels[width] = current
+    return levels
+
+
+def generate_renditions(img_path, widths=DEFAULT_WIDTHS, formats=("WEBP", "JPEG"), quality=85, workers=4):
+    if not img_path:
+        return None, None, "❌ Please upload an image"
+    if not formats:
+        return None, None, "❌ Please select at least one output format"
+    try:
+        widths = parse_widths(widths)
+        if not widths:
+            return None, None, "❌ Please provide at least one width"
+        stem = Path(img_path).stem
+        with track("renditions"):
+            plan = preflight(img_path, "renditions")
+            source = decode_image(img_path, plan)
+            with phase("process"):
+                # Browsers assume sRGB, so renditions are converted once up front and shipped without metadata
+                levels = build_pyramid(to_srgb(source), widths)
+            source_size = plan.width, plan.height
+
+            def encode_job(job):
+                width, fmt = job
+                return encode_output(levels[width], fmt, int(quality), keep_metadata=False)
+
+            jobs = [(width, fmt.upper()) for width in sorted(levels) for fmt in formats]
+            with ThreadPoolExecutor(max_workers=max(1, int(workers))) as executor:
+                encoded = map_in_context(executor, encode_job, jobs)
+
+        manifest = {"source": Path(img_path).name, "width": source_size[0], "height": source_size[1],
+                    "renditions": [], "srcset": {}}
+        zip_path = Path(img_path).with_name(f"{stem}_renditions.zip")
+        with zipfile.ZipFile(zip_path, mode="w") as zf:
+            for (width, fmt), data in zip(jobs, encoded):
+                extension, mime_type = RENDITION_FORMATS.get(fmt, (fmt.lower(), f"image/{fmt.lower()}"))
+                name = f"{stem}-{width}w.{extension}"
+                zf.writestr(name, data)
+                manifest["renditions"].append({
+                    "file": name, "width": width, "height": levels[width].height,
+                    "format": fmt, "type": mime_type, "bytes": len(data)
+                })
+                entry = f"{name} {width}w"
+                manifest["srcset"][mime_type] = ", ".join(filter(None, [manifest["srcset"].get(mime_type), entry]))
+            zf.writestr("manifest.json", json.dumps(manifest, indent=2))
+        return str(zip_path), manifest, f"✅ Generated {len(jobs)} renditions from a single decode{plan.note}"
+    except Exception as e:
+        logging.exception("Rendition generation failed")
+        return None, None, f"❌ Rendition error: {str(e)}"
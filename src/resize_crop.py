@@ -1,50 +1,59 @@
 from PIL import Image
-from pathlib import Path
 import logging
+from src.image_io import decode_image, emit_result, is_empty
+from src.guardrails import preflight
+from src.metrics import phase, track
+from src.smart_crop import smart_crop_box
 
-def resize_crop_image(img_path, mode, width, height, maintain_ratio, quality):
-    if not img_path:
+RESIZE_MODES = ["Resize", "Crop", "Smart Crop", "Canvas Resize"]
+RESAMPLE_FILTERS = ["NEAREST", "LANCZOS", "BILINEAR", "BICUBIC"]
+DOWNSCALABLE_MODES = ("Resize", "Smart Crop")
+
+
+def resize_crop(img, mode, width, height, maintain_ratio=True, quality="LANCZOS", detect_faces=False):
+    quality_filter = getattr(Image, quality, Image.LANCZOS)
+    if mode == "Resize":
+        if maintain_ratio:
+            # Same fit as Image.thumbnail, without mutating the caller's image
+            scale = min(int(width) / img.width, int(height) / img.height, 1)
+            size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+            img = img.resize(size, quality_filter, reducing_gap=2.0)
+        else:
+            img = img.resize((int(width), int(height)), quality_filter)
+    elif mode == "Crop":
+        crop_width, crop_height = int(width), int(height)
+        left = (img.width - crop_width) // 2
+        top = (img.height - crop_height) // 2
+        right = left + crop_width
+        bottom = top + crop_height
+        img = img.crop((left, top, right, bottom))
+    elif mode == "Smart Crop":
+        img = img.crop(smart_crop_box(img, width, height, use_faces=detect_faces))
+        img = img.resize((int(width), int(height)), quality_filter)
+    elif mode == "Canvas Resize":
+        canvas = Image.new("RGB", (int(width), int(height)), (255, 255, 255))
+        paste_x = (int(width) - img.width) // 2
+        paste_y = (int(height) - img.height) // 2
+        if img.mode == "RGBA":
+            canvas.paste(img, (paste_x, paste_y), img)
+        else:
+            canvas.paste(img, (paste_x, paste_y))
+        img = canvas
+    return img
+
+
+def resize_crop_image(source, mode, width, height, maintain_ratio, quality, detect_faces=False):
+    if is_empty(source):
         return None, "❌ Please upload an image"
     try:
-        img = Image.open(img_path)
-        original_size = img.size
-        quality_filter = getattr(Image, quality, Image.LANCZOS)
-        if mode == "Resize":
-            if maintain_ratio:
-                img.thumbnail((int(width), int(height)), quality_filter)
-            else:
-                img = img.resize((int(width), int(height)), quality_filter)
-        elif mode == "Crop":
-            crop_width, crop_height = int(width), int(height)
-            left = (img.width - crop_width) // 2
-            top = (img.height - crop_height) // 2
-            right = left + crop_width
-            bottom = top + crop_height
-            img = img.crop((left, top, right, bottom))
-        elif mode == "Smart Crop":
-            target_ratio = width / height
-            current_ratio = img.width / img.height
-            if current_ratio > target_ratio:
-                new_width = int(img.height * target_ratio)
-                left = (img.width - new_width) // 2
-                img = img.crop((left, 0, left + new_width, img.height))
-            else:
-                new_height = int(img.width / target_ratio)
-                top = (img.height - new_height) // 2
-                img = img.crop((0, top, img.width, top + new_height))
-            img = img.resize((int(width), int(height)), quality_filter)
-        elif mode == "Canvas Resize":
-            canvas = Image.new("RGB", (int(width), int(height)), (255, 255, 255))
-            paste_x = (int(width) - img.width) // 2
-            paste_y = (int(height) - img.height) // 2
-            if img.mode == "RGBA":
-                canvas.paste(img, (paste_x, paste_y), img)
-            else:
-                canvas.paste(img, (paste_x, paste_y))
-            img = canvas
-        out_path = Path(img_path).with_name(f"{mode.lower()}_{Path(img_path).name}")
-        img.save(out_path)
-        return str(out_path), f"✅ {mode} completed: {original_size} → {img.size}"
+        with track("resize_crop"):
+            # Crop and Canvas Resize work in source pixels, so only the scaling modes may be downscaled first
+            plan = preflight(source, "resize_crop", mode, allow_downscale=mode in DOWNSCALABLE_MODES)
+            img = decode_image(source, plan)
+            with phase("process"):
+                result = resize_crop(img, mode, width, height, maintain_ratio, quality, detect_faces)
+            output = emit_result(result, source, lambda p: p.with_name(f"{mode.lower()}_{p.name}"), img.format)
+        return output, f"✅ {mode} completed: {(plan.width, plan.height)} → {result.size}{plan.note}"
     except Exception as e:
         logging.exception("Resize/crop failed")
         return None, f"❌ Processing error: {str(e)}"
@@ -0,0 +1,97 @@
+import hashlib
+import logging
+from collections import OrderedDict
+from functools import lru_cache
+from PIL import Image
+import numpy as np
+import cv2
+
+PROXY_SIZE = 256
+FACE_CACHE_SIZE = 128
+_face_cache = OrderedDict()
+
+
+def _make_proxy(img, max_side=PROXY_SIZE):
+    if img.mode not in ("L", "LA", "RGB", "RGBA"):
+        img = img.convert("RGB")
+    # reduce() box-downsamples by an integer factor without making a full-size copy
+    factor = max(1, max(img.size) // (max_side * 2))
+    proxy = img.reduce(factor) if factor > 1 else img
+    proxy = proxy.convert("RGB")
+    proxy.thumbnail((max_side, max_side), Image.BILINEAR)
+    return np.asarray(proxy)
+
+
+@lru_cache(maxsize=1)
+def _face_cascade():
+    return cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+
+
+def detect_faces(proxy):
+    key = hashlib.blake2b(proxy.tobytes(), digest_size=16).hexdigest()
+    if key in _face_cache:
+        _face_cache.move_to_end(key)
+        return _face_cache[key]
+    gray = cv2.cvtColor(proxy, cv2.COLOR_RGB2GRAY)
+    faces = tuple(tuple(int(v) for v in face) for face in _face_cascade().detectMultiScale(gray, 1.1, 4, minSize=(12, 12)))
+    _face_cache[key] = faces
+    if len(_face_cache) > FACE_CACHE_SIZE:
+        _face_cache.popitem(last=False)
+    return faces
+
+
+def saliency_map(proxy, use_faces=False):
+    gray = cv2.cvtColor(proxy, cv2.COLOR_RGB2GRAY).astype(np.float32)
+    gx = cv2.Sobel(gray, cv2.CV_32F, 1, 0, ksize=3)
+    gy = cv2.Sobel(gray, cv2.CV_32F, 0, 1, ksize=3)
+    energy = cv2.magnitude(gx, gy)
+    saturation = cv2.cvtColor(proxy, cv2.COLOR_RGB2HSV)[:, :, 1].astype(np.float32)
+    saliency = energy / (energy.max() + 1e-6) + 0.5 * saturation / 255.0
+    saliency = cv2.GaussianBlur(saliency, (0, 0), 2)
+    if use_faces:
+        try:
+            boost = saliency.max() * 2
+            for x, y, w, h in detect_faces(proxy):
+                saliency[y:y + h, x:x + w] += boost
+        except Exception:
+            logging.exception("Face detection failed, falling back to edge saliency")
+    # Weak centre prior so flat images still crop around the middle
+    h, w = saliency.shape
+    yy, xx = np.mgrid[0:h, 0:w]
+    prior = np.exp(-(((xx - w / 2) / w) ** 2 + ((yy - h / 2) / h) ** 2) * 4)
+    return saliency + 0.2 * saliency.mean() * prior
+
+
+def best_window(saliency, win_w, win_h):
+    h, w = saliency.shape
+    integral = np.zeros((h + 1, w + 1), dtype=np.float64)
+    integral[1:, 1:] = saliency.cumsum(axis=0).cumsum(axis=1)
+    # Sum of every win_w x win_h window in one vectorised pass over the summed-area table
+    sums = (
+        integral[win_h:, win_w:]
+        - integral[:h + 1 - win_h, win_w:]
+        - integral[win_h:, :w + 1 - win_w]
+        + integral[:h + 1 - win_h, :w + 1 - win_w]
+    )
+    top, left = np.unravel_index(np.argmax(sums), sums.shape)
+    return int(left), int(top)
+
+
+def smart_crop_box(img, width, height, use_faces=False):
+    if width <= 0 or height <= 0:
+        raise ValueError(f"Smart Crop needs a positive width and height, got {width} x {height}")
+    target_ratio = width / height
+    # Extreme ratios can round one side of the crop to zero; keep at least a pixel
+    if img.width / img.height > target_ratio:
+        crop_w, crop_h = max(1, int(img.height * target_ratio)), img.height
+    else:
+        crop_w, crop_h = img.width, max(1, int(img.width / target_ratio))
+    proxy = _make_proxy(img)
+    scale_x = img.width / proxy.shape[1]
+    scale_y = img.height / proxy.shape[0]
+    win_w = min(proxy.shape[1], max(1, round(crop_w / scale_x)))
+    win_h = min(proxy.shape[0], max(1, round(crop_h / scale_y)))
+    left, top = best_window(saliency_map(proxy, use_faces), win_w, win_h)
+    left = min(max(0, round(left * scale_x)), img.width - crop_w)
+    top = min(max(0, round(top * scale_y)), img.height - crop_h)
+    return left, top, left + crop_w, top + crop_h
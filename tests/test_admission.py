@@ -0,0 +1,118 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import threading
+
+import pytest
+
+pytest.importorskip("dotenv")
+
+from src import admission
+from src.admission import JobGate, JobTimeoutError, OperationGates, ServerBusyError
+
+
+def _hold(gate, count=1):
+    # Occupy `count` slots with jobs that block until the returned event is set
+    release = threading.Event()
+    threads = [threading.Thread(target=gate.run, args=(release.wait,)) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    while gate.admitted < count:
+        release.wait(0.01)
+    return release, threads
+
+
+def _release(release, threads):
+    release.set()
+    for thread in threads:
+        thread.join()
+
+
+def test_run_returns_result_and_releases_slot():
+    gate = JobGate("test", 2)
+    assert gate.run(lambda a, b=0: a + b, 1, b=2) == 3
+    assert gate.admitted == 0
+
+
+def test_job_exception_propagates_and_releases_slot():
+    gate = JobGate("test", 1)
+    with pytest.raises(ValueError):
+        gate.run(lambda: int("x"))
+    assert gate.admitted == 0
+
+
+def test_full_gate_rejects_immediately():
+    gate = JobGate("test", 1, max_queue=1)
+    release, threads = _hold(gate, 2)
+    try:
+        with pytest.raises(ServerBusyError):
+            gate.run(lambda: None)
+    finally:
+        _release(release, threads)
+    assert gate.admitted == 0
+    assert gate.run(lambda: "ok") == "ok"
+
+
+def test_queued_job_waits_for_a_free_worker():
+    gate = JobGate("test", 1, max_queue=1)
+    release, threads = _hold(gate)
+    results = []
+    queued = threading.Thread(target=lambda: results.append(gate.run(lambda: "queued")))
+    queued.start()
+    while gate.admitted < 2:
+        release.wait(0.01)
+    assert results == []
+    _release(release, threads)
+    queued.join()
+    assert results == ["queued"]
+
+
+def test_timeout_keeps_slot_until_job_finishes():
+    gate = JobGate("test", 1, timeout=0.05)
+    release = threading.Event()
+    with pytest.raises(JobTimeoutError):
+        gate.run(release.wait)
+    # The job is still running, so its slot is still taken
+    assert gate.admitted == 1
+    with pytest.raises(ServerBusyError):
+        gate.run(lambda: None)
+    release.set()
+    while gate.admitted:
+        release.wait(0.01)
+    assert gate.run(lambda: "ok") == "ok"
+
+
+def test_job_timeout_error_is_not_reported_as_gate_timeout():
+    gate = JobGate("test", 1, timeout=5)
+
+    def job():
+        raise TimeoutError("upstream API timed out")
+
+    with pytest.raises(TimeoutError) as excinfo:
+        gate.run(job)
+    assert not isinstance(excinfo.value, JobTimeoutError)
+
+
+def test_wrap_keeps_function_metadata():
+    def operation(value):
+        return value * 2
+
+    wrapped = JobGate("test", 1).wrap(operation)
+    assert wrapped.__name__ == "operation"
+    assert wrapped(21) == 42
+
+
+def test_operation_gates_routing(monkeypatch):
+    monkeypatch.setattr(admission, "HEAVY_OPERATIONS", ["enhance", "remove_background"])
+    monkeypatch.setattr(admission, "OPERATION_CONCURRENCY_LIMITS", {"remove_background": 1, "convert": 3})
+    gates = OperationGates(prefix="t-")
+    assert gates.for_operation("resize_crop") is gates.light
+    assert gates.for_operation("enhance") is gates.heavy
+    rembg = gates.for_operation("remove_background")
+    assert (rembg.name, rembg.concurrency) == ("t-remove_background", 1)
+    assert rembg.capacity == 1 + admission.HEAVY_QUEUE_MAX_SIZE
+    convert = gates.for_operation("convert")
+    assert (convert.name, convert.concurrency) == ("t-convert", 3)
+    assert convert.capacity == 3 + admission.LIGHT_QUEUE_MAX_SIZE
+    assert len(gates.all()) == 4
@@ -0,0 +1,119 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import io
+import threading
+import zipfile
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+pytest.importorskip("cv2")
+pytest.importorskip("httpx")
+pytest.importorskip("fastapi")
+
+from fastapi.testclient import TestClient
+
+from src import api_server, guardrails
+from src.admission import JobGate
+
+client = TestClient(api_server.app)
+
+
+def _png(size=(32, 24), color="red"):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_single_raw_body():
+    response = client.post("/v1/convert?format=JPEG", content=_png())
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/jpeg"
+    assert Image.open(io.BytesIO(response.content)).format == "JPEG"
+
+
+def test_single_multipart():
+    response = client.post("/v1/resize?width=16&height=12", files={"file": ("a.png", _png(), "image/png")})
+    assert response.status_code == 200
+    assert Image.open(io.BytesIO(response.content)).size == (16, 12)
+
+
+def test_analyze_returns_json():
+    response = client.post("/v1/analyze", content=_png())
+    assert response.status_code == 200
+    assert response.json()["dimensions"] == "32 x 24"
+
+
+def test_batch_returns_zip_with_every_image():
+    files = [("file", ("a.png", _png(), "image/png")), ("file", ("b.png", _png(color="blue"), "image/png"))]
+    response = client.post("/v1/batch/convert?format=WEBP", files=files)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+    with zipfile.ZipFile(io.BytesIO(response.content)) as zf:
+        assert zf.namelist() == ["000_a.webp", "001_b.webp"]
+
+
+def test_batch_reports_failed_images():
+    files = [("file", ("a.png", _png(), "image/png")), ("file", ("bad.png", b"not an image", "image/png"))]
+    response = client.post("/v1/batch/convert", files=files)
+    with zipfile.ZipFile(io.BytesIO(response.content)) as zf:
+        assert zf.namelist() == ["000_a.png", "errors.json"]
+
+
+@pytest.mark.parametrize("query", [
+    "/v1/enhance?type=Bogus",
+    "/v1/resize?mode=Stretch",
+    "/v1/resize?width=abc",
+    "/v1/convert?colour=red",
+    "/v1/batch/convert?workers=abc",
+])
+def test_bad_parameters_are_400(query):
+    assert client.post(query, content=_png()).status_code == 400
+
+
+def test_choices_are_case_insensitive():
+    assert client.post("/v1/enhance?type=sharpening", content=_png()).status_code == 200
+
+
+def test_unknown_operation_is_404():
+    assert client.post("/v1/explode", content=_png()).status_code == 404
+
+
+def test_upload_over_limit_is_413(monkeypatch):
+    monkeypatch.setattr(api_server, "MAX_UPLOAD_BYTES", 16)
+    assert client.post("/v1/convert", content=_png()).status_code == 413
+
+
+def test_input_over_guardrail_is_413(monkeypatch):
+    monkeypatch.setattr(guardrails, "MAX_IMAGE_FRAMES", 0)
+    assert client.post("/v1/convert", content=_png()).status_code == 413
+
+
+@pytest.mark.parametrize("path", ["/v1/convert", "/v1/batch/convert"])
+def test_full_gate_is_503(monkeypatch, path):
+    gate = JobGate("test", 1)
+    release = threading.Event()
+    monkeypatch.setattr(api_server, "_gate", lambda operation: gate)
+    blocker = threading.Thread(target=gate.run, args=(release.wait,))
+    blocker.start()
+    try:
+        while gate.admitted == 0:
+            release.wait(0.01)
+        response = client.post(path, content=_png())
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "5"
+    finally:
+        release.set()
+        blocker.join()
+
+
+def test_batch_items_are_admitted_individually(monkeypatch):
+    gate = JobGate("test", 1)
+    monkeypatch.setattr(api_server, "_gate", lambda operation: gate)
+    files = [("file", (f"{i}.png", _png(), "image/png")) for i in range(3)]
+    response = client.post("/v1/batch/convert?workers=8", files=files)
+    with zipfile.ZipFile(io.BytesIO(response.content)) as zf:
+        assert zf.namelist() == ["000_0.png", "001_1.png", "002_2.png"]
+    assert gate.admitted == 0
@@ -0,0 +1,143 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import csv
+from pathlib import Path
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+pytest.importorskip("numpy")
+pytest.importorskip("dotenv")
+
+from src import guardrails
+from src.bulk_analysis import analyze_dataset, query_results
+from src.image_analysis import ImageAnalysis
+
+
+def _save(path, size=(8, 8), mode="RGB"):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    Image.new(mode, size).save(path)
+    return path
+
+
+def _rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def test_source_outside_root_is_rejected(tmp_path):
+    root = tmp_path / "root"
+    _save(tmp_path / "outside" / "a.png")
+    root.mkdir()
+    result, message = analyze_dataset(str(tmp_path / "outside"), "results.csv", root=root)
+    assert result is None
+    assert "inside" in message
+
+
+def test_results_path_outside_root_is_rejected(tmp_path):
+    root = tmp_path / "root"
+    _save(root / "images" / "a.png")
+    result, message = analyze_dataset("images", "../results.csv", root=root)
+    assert result is None
+    assert not (tmp_path / "results.csv").exists()
+    assert "error" in query_results("../results.csv", root=root)
+
+
+def test_manifest_entries_outside_root_are_skipped(tmp_path):
+    root = tmp_path / "root"
+    _save(root / "a.png")
+    _save(tmp_path / "secret.png")
+    (root / "manifest.txt").write_text("a.png\n../secret.png\n" + str(tmp_path / "secret.png") + "\n")
+    result, _ = analyze_dataset("manifest.txt", "results.csv", root=root)
+    assert [row["path"] for row in _rows(result)] == [str((root / "a.png").resolve())]
+
+
+def test_resume_skips_done_rows_and_writes_one_header(tmp_path):
+    images = tmp_path / "images"
+    images.mkdir()
+    result, _ = analyze_dataset("images", "results.csv", root=tmp_path)
+    assert _rows(result) == []
+
+    _save(images / "a.png")
+    _, message = analyze_dataset("images", "results.csv", root=tmp_path)
+    assert "Analyzed 1 images (0 resumed" in message
+    _save(images / "b.png")
+    _, message = analyze_dataset("images", "results.csv", root=tmp_path)
+    assert "Analyzed 1 images (1 resumed" in message
+    assert [Path(row["path"]).name for row in _rows(result)] == ["a.png", "b.png"]
+
+
+def test_partial_trailing_row_is_reanalyzed(tmp_path):
+    _save(tmp_path / "images" / "a.png")
+    _save(tmp_path / "images" / "b.png")
+    result, _ = analyze_dataset("images", "results.csv", root=tmp_path)
+    with open(result, "rb+") as f:
+        data = f.read()
+        # Cut the last row in half, as an interrupted write would
+        f.truncate(len(data) - 10)
+    _, message = analyze_dataset("images", "results.csv", root=tmp_path)
+    assert "Analyzed 1 images (1 resumed" in message
+    rows = _rows(result)
+    assert [Path(row["path"]).name for row in rows] == ["a.png", "b.png"]
+    assert rows[-1]["width"] == "8"
+
+
+def test_resume_with_different_mode_is_refused(tmp_path):
+    _save(tmp_path / "images" / "a.png")
+    analyze_dataset("images", "results.csv", metadata_only=True, root=tmp_path)
+    result, message = analyze_dataset("images", "results.csv", metadata_only=False, root=tmp_path)
+    assert result is None
+    assert "metadata only" in message
+
+
+def test_full_statistics_run_in_worker_processes(tmp_path):
+    (tmp_path / "images").mkdir()
+    Image.new("RGB", (8, 8), (200, 100, 50)).save(tmp_path / "images" / "a.png")
+    result, message = analyze_dataset("images", "results.csv", metadata_only=False, workers=1, root=tmp_path)
+    assert result, message
+    (row,) = _rows(result)
+    assert (row["mean_red"], row["mean_green"], row["mean_blue"], row["error"]) == ("200", "100", "50", "")
+
+
+def test_query_filters(tmp_path):
+    _save(tmp_path / "images" / "small.png", (10, 10), "RGBA")
+    _save(tmp_path / "images" / "large.jpg", (2000, 1000))
+    _save(tmp_path / "images" / "mid.png", (1000, 1000))
+    analyze_dataset("images", "results.csv", root=tmp_path)
+
+    def names(**filters):
+        result = query_results("results.csv", root=tmp_path, **filters)
+        return sorted(Path(image["path"]).name for image in result["images"])
+
+    assert names() == ["large.jpg", "mid.png", "small.png"]
+    assert names(has_transparency=True) == ["small.png"]
+    assert names(has_transparency=False) == ["large.jpg", "mid.png"]
+    assert names(image_format="jpeg") == ["large.jpg"]
+    assert names(min_megapixels=1) == ["large.jpg", "mid.png"]
+    assert names(min_megapixels=1.5) == ["large.jpg"]
+    size = (tmp_path / "images" / "mid.png").stat().st_size / (1024 * 1024)
+    assert "mid.png" in names(min_file_size_mb=size)
+    assert "small.png" not in names(min_file_size_mb=size)
+
+
+def test_metadata_rows_ignore_decode_guardrails(tmp_path, monkeypatch):
+    path = _save(tmp_path / "images" / "huge.png", (2000, 1000))
+    monkeypatch.setattr(guardrails, "MAX_INPUT_FILE_MB", 0)
+    # Over twice the pixel ceiling, where Image.open raises instead of warning
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 100_000)
+    assert "error" in ImageAnalysis.analyze_record(path, metadata_only=False)
+    analyze_dataset("images", "results.csv", root=tmp_path)
+    (row,) = _rows(tmp_path / "results.csv")
+    assert (row["width"], row["height"], row["format"], row["error"]) == ("2000", "1000", "PNG", "")
+    assert int(row["file_size_bytes"]) == path.stat().st_size
+    assert query_results("results.csv", min_megapixels=2, root=tmp_path)["count"] == 1
+
+
+def test_metadata_rows_report_unreadable_files(tmp_path):
+    (tmp_path / "images").mkdir()
+    (tmp_path / "images" / "broken.png").write_bytes(b"not an image")
+    analyze_dataset("images", "results.csv", root=tmp_path)
+    (row,) = _rows(tmp_path / "results.csv")
+    assert "cannot identify" in row["error"]
@@ -0,0 +1,49 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+pytest.importorskip("cv2")
+pytest.importorskip("dotenv")
+
+from src.cli import main
+
+
+@pytest.fixture
+def image_path(tmp_path):
+    path = tmp_path / "photo.png"
+    Image.new("RGB", (40, 30), "green").save(path)
+    return path
+
+
+def test_writes_outputs_to_directory(tmp_path, image_path):
+    out_dir = tmp_path / "out"
+    assert main(["resize", str(image_path), "-p", "width=20", "-p", "height=20", "-o", str(out_dir)]) == 0
+    with Image.open(out_dir / "photo_resize.png") as img:
+        assert img.size == (20, 15)
+
+
+def test_analyze_prints_json_lines(capsys, image_path):
+    assert main(["analyze", str(image_path)]) == 0
+    record = json.loads(capsys.readouterr().out)
+    assert record["file"] == str(image_path)
+    assert record["dimensions"] == "40 x 30"
+
+
+@pytest.mark.parametrize("bad_input", ["broken.png", "missing.png"])
+def test_failed_input_sets_exit_code(capsys, tmp_path, image_path, bad_input):
+    (tmp_path / "broken.png").write_bytes(b"not an image")
+    assert main(["convert", str(tmp_path / bad_input), str(image_path), "-o", str(tmp_path / "out")]) == 1
+    assert (tmp_path / "out" / "photo_convert.png").exists()
+    assert bad_input in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("param", ["type=Bogus", "nonsense=1", "novalue"])
+def test_bad_parameters_exit_with_usage_error(image_path, param):
+    with pytest.raises(SystemExit) as excinfo:
+        main(["enhance", str(image_path), "-p", param])
+    assert excinfo.value.code == 2
@@ -0,0 +1,112 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import random
+import shutil
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+
+from src.duplicate_detection import (
+    BKTree, HASH_FUNCTIONS, copy_for_duplicate, find_duplicate_clusters, find_duplicates, hamming_distance,
+    identical_clusters
+)
+
+
+def _smooth_image(seed, size=256):
+    # Low-frequency structure, which is what perceptual hashes look at
+    cells = np.random.default_rng(seed).integers(0, 256, (8, 8, 3), dtype=np.uint8)
+    return Image.fromarray(cells, "RGB").resize((size, size), Image.BICUBIC)
+
+
+@pytest.fixture
+def images(tmp_path):
+    original = tmp_path / "original.png"
+    _smooth_image(1).save(original)
+    exact = tmp_path / "exact.png"
+    shutil.copyfile(original, exact)
+    recompressed = tmp_path / "recompressed.jpg"
+    _smooth_image(1).resize((200, 200)).save(recompressed, quality=70)
+    other = tmp_path / "other.png"
+    _smooth_image(2).save(other)
+    broken = tmp_path / "broken.png"
+    broken.write_bytes(b"not an image")
+    return [str(original), str(exact), str(recompressed), str(other), str(broken)]
+
+
+def test_bktree_search_matches_brute_force():
+    rng = random.Random(7)
+    keys = [rng.getrandbits(64) for _ in range(300)]
+    keys += [keys[0], keys[1] ^ 1, keys[2] ^ 0b111]
+    tree = BKTree()
+    for index, key in enumerate(keys):
+        tree.add(key, index)
+    for query in keys[:20] + [rng.getrandbits(64) for _ in range(20)]:
+        for radius in (0, 3, 12, 28):
+            expected = sorted(
+                (hamming_distance(query, key), index) for index, key in enumerate(keys)
+                if hamming_distance(query, key) <= radius
+            )
+            assert sorted(tree.search(query, radius)) == expected
+
+
+def test_empty_bktree_finds_nothing():
+    assert BKTree().search(0, 64) == []
+
+
+@pytest.mark.parametrize("method", HASH_FUNCTIONS)
+def test_clusters_group_near_duplicates(images, method):
+    clusters = find_duplicate_clusters(images, method, threshold=5)
+    assert sorted(clusters) == [[0, 1, 2], [3], [4]]
+
+
+def test_threshold_zero_keeps_only_identical_hashes(images):
+    clusters = find_duplicate_clusters(images[:2] + images[3:4], threshold=0)
+    assert sorted(clusters) == [[0, 1], [2]]
+
+
+def test_find_duplicates_summary(images):
+    result = find_duplicates(images)
+    assert result["images"] == 5
+    assert result["unique"] == 3
+    assert result["duplicate_clusters"] == [images[:3]]
+
+
+def test_identical_clusters_require_identical_files(tmp_path):
+    colour = tmp_path / "colour.png"
+    _smooth_image(1).save(colour)
+    copy = tmp_path / "copy.png"
+    shutil.copyfile(colour, copy)
+    grey = tmp_path / "grey.png"
+    _smooth_image(1).convert("L").convert("RGB").save(grey)
+    paths = [str(colour), str(grey), str(copy)]
+    # Greyscale hashing cannot tell the colour image from its black-and-white copy
+    assert find_duplicate_clusters(paths, threshold=0) == [[0, 1, 2]]
+    assert identical_clusters(paths) == [[0, 2], [1]]
+
+
+def test_copy_for_duplicate_names_output_after_duplicate(tmp_path):
+    source_dir, duplicate_dir = tmp_path / "a", tmp_path / "b"
+    source_dir.mkdir()
+    duplicate_dir.mkdir()
+    output = source_dir / "enhanced_photo.jpg"
+    output.write_bytes(b"result")
+    copied = copy_for_duplicate(output, source_dir / "photo.jpg", duplicate_dir / "copy.jpg")
+    assert copied == str(duplicate_dir / "enhanced_copy.jpg")
+    assert (duplicate_dir / "enhanced_copy.jpg").read_bytes() == b"result"
+
+
+@pytest.mark.parametrize("output, source, duplicate, expected", [
+    ("enhanced_e.jpg", "e.jpg", "x.jpg", "enhanced_x.jpg"),
+    ("nobg_n.png", "n.png", "photo.png", "nobg_photo.png"),
+    ("n.png", "n.jpg", "photo.jpg", "photo.png"),
+    ("smart crop_a_a.jpg", "a_a.jpg", "b.jpg", "smart crop_b.jpg"),
+])
+def test_copy_for_duplicate_replaces_only_the_trailing_stem(tmp_path, output, source, duplicate, expected):
+    (tmp_path / output).write_bytes(b"result")
+    copied = copy_for_duplicate(tmp_path / output, tmp_path / source, tmp_path / duplicate)
+    assert copied == str(tmp_path / expected)
@@ -0,0 +1,132 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import io
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+pytest.importorskip("cv2")
+pytest.importorskip("dotenv")
+
+from src import guardrails
+from src.duplicate_detection import find_duplicate_clusters
+from src.guardrails import InputRejectedError, preflight
+from src.image_analysis import ImageAnalysis
+from src.image_io import decode_image
+from src.image_processing import ImageProcessor
+
+
+def _jpeg(size=(1600, 1200)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, (200, 100, 50)).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def _gif(frames):
+    buffer = io.BytesIO()
+    images = [Image.new("RGB", (8, 8), (i * 40, 0, 0)) for i in range(frames)]
+    images[0].save(buffer, format="GIF", save_all=True, append_images=images[1:])
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def small_budget(monkeypatch):
+    # 1600x1200 RGB at 3x needs ~16 MB
+    monkeypatch.setattr(guardrails, "OPERATION_MEMORY_BUDGET_MB", 4)
+
+
+def test_within_budget_is_untouched():
+    plan = preflight(_jpeg(), "enhance")
+    assert plan.scale == 1
+    assert plan.note == ""
+    assert decode_image(_jpeg(), plan).size == (1600, 1200)
+
+
+def test_over_budget_is_downscaled(small_budget):
+    data = _jpeg()
+    plan = preflight(data, "enhance")
+    assert plan.scale < 1
+    assert plan.estimated_bytes * plan.scale ** 2 == pytest.approx(4 * 1024 * 1024)
+    img = decode_image(data, plan)
+    assert img.size == plan.target_size
+    assert img.format == "JPEG"
+    assert "downscaled from 1600x1200" in plan.note
+
+
+def test_over_budget_is_rejected_when_downscaling_is_not_allowed(small_budget):
+    with pytest.raises(InputRejectedError):
+        preflight(_jpeg(), "convert", allow_downscale=False)
+
+
+def test_reject_policy(small_budget, monkeypatch):
+    monkeypatch.setattr(guardrails, "OVERSIZE_POLICY", "reject")
+    with pytest.raises(InputRejectedError):
+        preflight(_jpeg(), "enhance")
+
+
+def test_per_operation_pixel_limit(monkeypatch):
+    monkeypatch.setattr(guardrails, "OPERATION_PIXEL_LIMITS", {"enhance": 480_000})
+    assert preflight(_jpeg(), "enhance").target_size == (800, 600)
+    assert preflight(_jpeg(), "resize_crop").scale == 1
+
+
+def test_frame_limit(monkeypatch):
+    monkeypatch.setattr(guardrails, "MAX_IMAGE_FRAMES", 3)
+    assert preflight(_gif(3), "convert").frames == 3
+    with pytest.raises(InputRejectedError, match="4 frames"):
+        preflight(_gif(4), "convert")
+
+
+def test_file_size_limit(monkeypatch, tmp_path):
+    monkeypatch.setattr(guardrails, "MAX_INPUT_FILE_MB", 0.001)
+    path = tmp_path / "big.jpg"
+    path.write_bytes(_jpeg())
+    for source in (str(path), path.read_bytes()):
+        with pytest.raises(InputRejectedError, match="limit is"):
+            preflight(source, "convert")
+
+
+def test_metadata_only_analysis_ignores_memory_budget(small_budget):
+    assert preflight(_jpeg(), "analysis", "metadata").scale == 1
+    assert preflight(_jpeg(), "analysis").scale < 1
+
+
+def test_analysis_reports_original_size_when_downscaled(small_budget):
+    result = ImageAnalysis.analyze_image(_jpeg())
+    assert result["dimensions"] == "1600 x 1200"
+    assert abs(result["average_color"]["red"] - 200) <= 2
+
+
+def test_analysis_rejects_over_limit(monkeypatch):
+    monkeypatch.setattr(guardrails, "MAX_IMAGE_FRAMES", 1)
+    assert "error" in ImageAnalysis.analyze_image(_gif(2))
+
+
+def test_preflight_leaves_caller_streams_open():
+    stream = io.BytesIO(_jpeg((40, 30)))
+    preflight(stream, "convert")
+    assert not stream.closed
+    result, message = ImageProcessor().convert_image(stream, "PNG")
+    assert result is not None, message
+    with Image.open(io.BytesIO(result)) as img:
+        assert (img.format, img.size) == ("PNG", (40, 30))
+    result, message = ImageProcessor().enhance_image(io.BytesIO(_jpeg((40, 30))), "Sharpening")
+    assert result is not None, message
+
+
+def test_operations_report_rejections(small_budget):
+    result, message = ImageProcessor().convert_image(_jpeg(), "PNG")
+    assert result is None
+    assert "MB" in message
+
+
+def test_rejected_image_is_not_hashed(monkeypatch, tmp_path):
+    paths = []
+    for name in ("a.jpg", "b.jpg"):
+        paths.append(tmp_path / name)
+        paths[-1].write_bytes(_jpeg())
+    monkeypatch.setattr(guardrails, "MAX_INPUT_FILE_MB", 0.001)
+    # Rejected images get no hash, so they cannot be clustered together
+    assert find_duplicate_clusters(paths) == [[0], [1]]
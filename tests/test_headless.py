@@ -0,0 +1,87 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("PIL.Image")
+pytest.importorskip("cv2")
+pytest.importorskip("dotenv")
+
+from src import headless
+from src.admission import JobGate, ServerBusyError
+from src.headless import run_batch
+
+
+@pytest.fixture
+def running(monkeypatch):
+    # Replaces the real operations with a short job that records how many run at once
+    state = {"now": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def operation(name, data, params=None):
+        with lock:
+            state["now"] += 1
+            state["peak"] = max(state["peak"], state["now"])
+        time.sleep(data)
+        with lock:
+            state["now"] -= 1
+        return data
+
+    monkeypatch.setattr(headless, "run_operation", operation)
+    return state
+
+
+def test_concurrent_batches_share_the_gate(running):
+    gate = JobGate("test", 2, max_queue=8)
+    results = []
+    batches = [
+        threading.Thread(target=lambda: results.append(run_batch("enhance", [0.05] * 4, workers=2, gate=gate)))
+        for _ in range(2)
+    ]
+    for batch in batches:
+        batch.start()
+    for batch in batches:
+        batch.join()
+    assert running["peak"] == 2
+    assert results == [[(0.05, None)] * 4] * 2
+
+
+def test_items_time_out_individually(running):
+    gate = JobGate("test", 2, timeout=0.2)
+    results = run_batch("convert", [0.01, 0.5, 0.01], workers=2, gate=gate)
+    assert results[0] == (0.01, None) and results[2] == (0.01, None)
+    assert results[1][0] is None and "timed out" in results[1][1]
+
+
+def test_batch_with_no_admitted_items_is_busy(running):
+    gate = JobGate("test", 1)
+    release = threading.Event()
+    blocker = threading.Thread(target=gate.run, args=(release.wait,))
+    blocker.start()
+    try:
+        while gate.admitted == 0:
+            release.wait(0.01)
+        with pytest.raises(ServerBusyError):
+            run_batch("convert", [0.01, 0.01], gate=gate)
+    finally:
+        release.set()
+        blocker.join()
+
+
+def test_load_errors_are_per_item(running):
+    loaded = []
+
+    def load(item):
+        loaded.append(item)
+        if item == "missing":
+            raise FileNotFoundError(item)
+        return 0.01
+
+    results = run_batch("convert", ["a", "missing", "b"], workers=1, load=load)
+    assert loaded == ["a", "missing", "b"]
+    assert results[0] == (0.01, None) and results[2] == (0.01, None)
+    assert results[1] == (None, "missing")
@@ -0,0 +1,84 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import io
+from pathlib import Path
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+pytest.importorskip("dotenv")
+
+from src.custom_filters import apply_custom_filter
+from src.image_processing import ImageProcessor
+from src.resize_crop import resize_crop_image
+
+processor = ImageProcessor()
+
+OPERATIONS = {
+    "enhance": lambda source: processor.enhance_image(source, "Sharpening"),
+    "resize": lambda source: resize_crop_image(source, "Resize", 20, 15, True, "LANCZOS"),
+    "filter": lambda source: apply_custom_filter(source, 10, 0, 0, 0),
+}
+
+
+def _original():
+    return Image.new("RGB", (40, 30), (200, 100, 50))
+
+
+def _jpeg():
+    buffer = io.BytesIO()
+    _original().save(buffer, format="JPEG", quality=95)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("operation", OPERATIONS)
+def test_path_in_writes_a_file_in_the_source_format(tmp_path, operation):
+    path = tmp_path / "photo.jpg"
+    path.write_bytes(_jpeg())
+    output, message = OPERATIONS[operation](str(path))
+    assert isinstance(output, str), message
+    assert Path(output).parent == tmp_path and Path(output) != path
+    with Image.open(output) as img:
+        assert img.format == "JPEG"
+
+
+@pytest.mark.parametrize("operation", OPERATIONS)
+def test_pil_in_pil_out(operation):
+    output, message = OPERATIONS[operation](_original())
+    assert isinstance(output, Image.Image), message
+    assert output.mode == "RGB"
+
+
+@pytest.mark.parametrize("operation", OPERATIONS)
+def test_array_in_array_out(operation):
+    output, message = OPERATIONS[operation](np.asarray(_original()))
+    assert isinstance(output, np.ndarray), message
+    assert output.dtype == np.uint8 and output.shape[2] == 3
+
+
+@pytest.mark.parametrize("operation", OPERATIONS)
+@pytest.mark.parametrize("wrap", [bytes, io.BytesIO], ids=["bytes", "stream"])
+def test_encoded_in_encoded_out_in_the_same_format(operation, wrap):
+    output, message = OPERATIONS[operation](wrap(_jpeg()))
+    assert isinstance(output, bytes), message
+    with Image.open(io.BytesIO(output)) as img:
+        assert img.format == "JPEG"
+
+
+def test_transparency_survives_pil_input():
+    img = Image.new("RGBA", (40, 30), (255, 0, 0, 0))
+    output, _ = processor.enhance_image(img, "Sharpening")
+    assert output.mode == "RGBA"
+    assert output.getpixel((0, 0))[3] == 0
+
+
+@pytest.mark.parametrize("source", [_original, lambda: np.asarray(_original()), _jpeg], ids=["pil", "array", "bytes"])
+def test_convert_returns_encoded_bytes(source):
+    output, message = processor.convert_image(source(), "WEBP")
+    assert isinstance(output, bytes), message
+    with Image.open(io.BytesIO(output)) as img:
+        assert (img.format, img.size) == ("WEBP", (40, 30))
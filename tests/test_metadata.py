@@ -0,0 +1,89 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import io
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+features = pytest.importorskip("PIL.features")
+pytest.importorskip("numpy")
+pytest.importorskip("dotenv")
+
+from src.image_io import decode_image, encode_image
+from src.metadata import ORIENTATION
+
+MAKE = 0x010F
+
+
+def _encoded(img, fmt="JPEG", **kwargs):
+    buffer = io.BytesIO()
+    img.save(buffer, format=fmt, **kwargs)
+    return buffer.getvalue()
+
+
+def _exif(orientation=None):
+    exif = Image.Exif()
+    exif[MAKE] = "TestCam"
+    if orientation:
+        exif[ORIENTATION] = orientation
+    return exif.tobytes()
+
+
+def _require_encoder(output_format):
+    if output_format == "WEBP" and not features.check("webp"):
+        pytest.skip("No WEBP encoder in this Pillow build")
+
+
+def _srgb_profile():
+    ImageCms = pytest.importorskip("PIL.ImageCms")
+    return ImageCms.ImageCmsProfile(ImageCms.createProfile("sRGB")).tobytes()
+
+
+def test_orientation_is_applied_on_decode():
+    data = _encoded(Image.new("RGB", (40, 20), "red"), exif=_exif(orientation=6))
+    img = decode_image(data)
+    assert img.size == (20, 40)
+    assert img.format == "JPEG"
+    assert ORIENTATION not in img.getexif()
+
+
+def test_upright_image_is_not_copied():
+    img = Image.open(io.BytesIO(_encoded(Image.new("RGB", (40, 20)), exif=_exif())))
+    assert decode_image(img) is img
+
+
+@pytest.mark.parametrize("output_format", ["JPEG", "PNG", "WEBP"])
+def test_exif_is_carried_without_orientation(output_format):
+    _require_encoder(output_format)
+    img = decode_image(_encoded(Image.new("RGB", (40, 20)), exif=_exif(orientation=8)))
+    saved = Image.open(io.BytesIO(encode_image(img, output_format)))
+    exif = saved.getexif()
+    assert exif[MAKE] == "TestCam"
+    assert ORIENTATION not in exif
+    assert saved.size == (20, 40)
+
+
+def test_profile_kept_when_colour_space_is_unchanged():
+    profile = _srgb_profile()
+    img = decode_image(_encoded(Image.new("RGB", (8, 8)), icc_profile=profile))
+    assert Image.open(io.BytesIO(encode_image(img, "PNG"))).info.get("icc_profile") == profile
+
+
+def test_cmyk_profile_not_attached_to_rgb_output():
+    # Not a parseable profile, so the sRGB transform fails and the profile must simply be dropped
+    img = decode_image(_encoded(Image.new("CMYK", (8, 8)), icc_profile=b"cmyk-profile"))
+    assert img.mode == "CMYK"
+    saved = Image.open(io.BytesIO(encode_image(img, "JPEG")))
+    assert saved.mode == "RGB"
+    assert saved.info.get("icc_profile") != b"cmyk-profile"
+
+
+@pytest.mark.parametrize("output_format", ["PNG", "WEBP"])
+def test_gray_profile_not_attached_to_rgb_output(output_format):
+    _require_encoder(output_format)
+    img = decode_image(_encoded(Image.new("L", (8, 8)), "PNG", icc_profile=b"gray-profile"))
+    saved = Image.open(io.BytesIO(encode_image(img, output_format)))
+    assert saved.mode in ("RGB", "RGBA")
+    assert saved.info.get("icc_profile") != b"gray-profile"
@@ -0,0 +1,55 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+pytest.importorskip("cv2")
+pytest.importorskip("dotenv")
+
+from src import metrics
+from src.duplicate_detection import find_duplicate_clusters
+from src.metrics import PHASE_SECONDS, map_in_context, phase, track
+from src.renditions import generate_renditions
+
+
+def _phases(operation):
+    return {key[1]: state[2] for key, state in PHASE_SECONDS._values.items() if key[0] == operation}
+
+
+@pytest.fixture(autouse=True)
+def fresh_phases(monkeypatch):
+    monkeypatch.setattr(PHASE_SECONDS, "_values", {})
+
+
+def test_pool_jobs_inherit_the_current_operation():
+    def job(item):
+        with phase("encode"):
+            return metrics._current.get()
+
+    with track("pooled"), ThreadPoolExecutor(max_workers=2) as executor:
+        assert map_in_context(executor, job, range(4)) == ["pooled"] * 4
+    assert _phases("pooled") == {"encode": 4}
+    assert _phases("untracked") == {}
+
+
+def test_renditions_are_tracked(tmp_path):
+    path = tmp_path / "photo.png"
+    Image.new("RGB", (400, 300), "teal").save(path)
+    zip_path, _, message = generate_renditions(str(path), "100,200", ("WEBP", "JPEG"))
+    assert zip_path, message
+    assert _phases("renditions") == {"decode": 1, "process": 1, "encode": 4}
+    assert _phases("untracked") == {}
+
+
+def test_duplicate_detection_is_tracked(tmp_path):
+    paths = []
+    for name in ("a.png", "b.png"):
+        paths.append(tmp_path / name)
+        Image.new("RGB", (64, 64), "teal").save(paths[-1])
+    assert find_duplicate_clusters(paths) == [[0, 1]]
+    assert _phases("find_duplicates") == {"decode": 2, "process": 1}
+    assert _phases("untracked") == {}
@@ -0,0 +1,72 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import io
+import json
+import zipfile
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+pytest.importorskip("cv2")
+pytest.importorskip("dotenv")
+
+from src.image_io import encode_image, format_save_kwargs
+from src.renditions import build_pyramid, generate_renditions, parse_widths
+
+
+@pytest.fixture
+def image_path(tmp_path):
+    path = tmp_path / "photo.png"
+    Image.new("RGB", (800, 600), "teal").save(path)
+    return path
+
+
+def test_parse_widths():
+    assert parse_widths("640, 320;1280,,0") == [1280, 640, 320]
+
+
+def test_pyramid_widths_keep_aspect_ratio():
+    levels = build_pyramid(Image.new("RGB", (800, 600)), [640, 100, 320])
+    assert {width: level.size for width, level in levels.items()} == {
+        640: (640, 480), 320: (320, 240), 100: (100, 75)
+    }
+
+
+def test_pyramid_never_upscales():
+    img = Image.new("RGB", (800, 600))
+    levels = build_pyramid(img, [1920, 800, 1280, 400])
+    assert sorted(levels) == [400, 800]
+    assert levels[800] is img
+
+
+def test_manifest_and_srcset(image_path):
+    zip_path, manifest, message = generate_renditions(str(image_path), "1920,400,200", ("WEBP", "JPEG"))
+    assert zip_path, message
+    assert (manifest["source"], manifest["width"], manifest["height"]) == ("photo.png", 800, 600)
+    assert [(r["width"], r["height"], r["format"]) for r in manifest["renditions"]] == [
+        (200, 150, "WEBP"), (200, 150, "JPEG"),
+        (400, 300, "WEBP"), (400, 300, "JPEG"),
+        (800, 600, "WEBP"), (800, 600, "JPEG"),
+    ]
+    assert manifest["srcset"] == {
+        "image/webp": "photo-200w.webp 200w, photo-400w.webp 400w, photo-800w.webp 800w",
+        "image/jpeg": "photo-200w.jpg 200w, photo-400w.jpg 400w, photo-800w.jpg 800w",
+    }
+    with zipfile.ZipFile(zip_path) as zf:
+        assert json.loads(zf.read("manifest.json")) == manifest
+        for rendition in manifest["renditions"]:
+            data = zf.read(rendition["file"])
+            assert len(data) == rendition["bytes"]
+            with Image.open(io.BytesIO(data)) as img:
+                assert img.size == (rendition["width"], rendition["height"])
+
+
+def test_avif_honours_quality():
+    assert format_save_kwargs("avif", 40) == {"quality": 40}
+    Image.init()
+    if "AVIF" not in Image.SAVE:
+        pytest.skip("No AVIF encoder in this Pillow build")
+    img = Image.effect_noise((128, 128), 64).convert("RGB")
+    assert len(encode_image(img, "AVIF", 20)) < len(encode_image(img, "AVIF", 90))
@@ -0,0 +1,99 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from collections import OrderedDict
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+pytest.importorskip("dotenv")
+
+from src import smart_crop
+from src.resize_crop import resize_crop_image
+from src.smart_crop import best_window, detect_faces, smart_crop_box
+
+
+def _window_sums(saliency, win_w, win_h):
+    h, w = saliency.shape
+    # Brute force: sum every window position directly
+    return np.array([
+        [saliency[top:top + win_h, left:left + win_w].sum() for left in range(w - win_w + 1)]
+        for top in range(h - win_h + 1)
+    ])
+
+
+@pytest.mark.parametrize("win_w, win_h", [(1, 1), (5, 3), (12, 7), (17, 9), (20, 11)])
+def test_best_window_matches_brute_force(win_w, win_h):
+    saliency = np.random.default_rng(win_w * 31 + win_h).random((11, 20)).astype(np.float32)
+    left, top = best_window(saliency, win_w, win_h)
+    sums = _window_sums(saliency, win_w, win_h)
+    assert sums[top, left] == pytest.approx(sums.max(), rel=1e-6)
+
+
+def test_off_centre_subject_stays_in_the_crop():
+    img = Image.new("RGB", (1200, 400), (128, 128, 128))
+    subject = np.random.default_rng(3).integers(0, 256, (160, 160, 3), dtype=np.uint8)
+    img.paste(Image.fromarray(subject, "RGB"), (980, 120))
+    left, top, right, bottom = smart_crop_box(img, 400, 400)
+    assert (right - left, bottom - top) == (400, 400)
+    assert left <= 980 and right >= 1140
+
+
+@pytest.fixture
+def cascade(monkeypatch):
+    calls = []
+
+    class FakeCascade:
+        def detectMultiScale(self, gray, *args, **kwargs):
+            calls.append(gray.shape)
+            return np.array([[1, 2, 3, 4]])
+
+    monkeypatch.setattr(smart_crop, "_face_cache", OrderedDict())
+    monkeypatch.setattr(smart_crop, "_face_cascade", lambda: FakeCascade())
+    return calls
+
+
+def test_face_detection_is_cached_per_proxy(cascade):
+    proxy = np.zeros((32, 48, 3), dtype=np.uint8)
+    assert detect_faces(proxy) == ((1, 2, 3, 4),)
+    assert detect_faces(proxy.copy()) == ((1, 2, 3, 4),)
+    assert len(cascade) == 1
+    detect_faces(np.full((32, 48, 3), 7, dtype=np.uint8))
+    assert len(cascade) == 2
+
+
+def test_face_cache_evicts_least_recently_used(cascade, monkeypatch):
+    monkeypatch.setattr(smart_crop, "FACE_CACHE_SIZE", 2)
+    proxies = [np.full((8, 8, 3), value, dtype=np.uint8) for value in range(3)]
+    for proxy in proxies[:2]:
+        detect_faces(proxy)
+    detect_faces(proxies[0])
+    detect_faces(proxies[2])
+    assert len(cascade) == 3
+    detect_faces(proxies[0])
+    assert len(cascade) == 3
+    detect_faces(proxies[1])
+    assert len(cascade) == 4
+
+
+@pytest.mark.parametrize("width, height", [(100, 0), (0, 100), (-5, 10)])
+def test_non_positive_target_is_rejected(width, height):
+    img = Image.new("RGB", (64, 48))
+    with pytest.raises(ValueError, match="positive"):
+        smart_crop_box(img, width, height)
+    result, message = resize_crop_image(img, "Smart Crop", width, height, True, "LANCZOS")
+    assert result is None
+    assert "positive" in message
+
+
+@pytest.mark.parametrize("size, target", [((1, 1), (50, 50)), ((1, 300), (1000, 1)), ((300, 1), (1, 1000))])
+def test_tiny_and_extreme_shapes_still_crop(size, target):
+    img = Image.new("RGB", size, "white")
+    left, top, right, bottom = smart_crop_box(img, *target)
+    assert 0 <= left < right <= img.width
+    assert 0 <= top < bottom <= img.height
+    result, message = resize_crop_image(img, "Smart Crop", *target, True, "LANCZOS")
+    assert result.size == target, message